@@ -0,0 +1,168 @@
+"""add_dashboard_summary_tables
+
+Revision ID: a3c6e9f1b254
+Revises: f4b9d2e6a137
+Create Date: 2026-10-17 14:05:31.572019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c6e9f1b254'
+down_revision: Union[str, None] = 'f4b9d2e6a137'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables counted by dashboard_count_rows(); the trigger argument is the counter name
+COUNTED_TABLES = ['users', 'blocked_users']
+
+FUNCTIONS = [
+    """
+    CREATE FUNCTION dashboard_count_rows() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE dashboard_counters SET value = value + 1 WHERE name = TG_ARGV[0];
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE dashboard_counters SET value = value - 1 WHERE name = TG_ARGV[0];
+        ELSE
+            UPDATE dashboard_counters SET value = 0 WHERE name = TG_ARGV[0];
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION dashboard_events_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO event_stats (event_id, reg_count, ticket_count) VALUES (NEW.id, 0, 0);
+            IF NEW.active THEN
+                UPDATE dashboard_counters SET value = value + 1 WHERE name = 'active_events';
+            END IF;
+        ELSIF TG_OP = 'UPDATE' THEN
+            IF NEW.active AND NOT OLD.active THEN
+                UPDATE dashboard_counters SET value = value + 1 WHERE name = 'active_events';
+            ELSIF OLD.active AND NOT NEW.active THEN
+                UPDATE dashboard_counters SET value = value - 1 WHERE name = 'active_events';
+            END IF;
+        ELSIF TG_OP = 'DELETE' THEN
+            IF OLD.active THEN
+                UPDATE dashboard_counters SET value = value - 1 WHERE name = 'active_events';
+            END IF;
+        ELSE
+            UPDATE dashboard_counters SET value = 0 WHERE name = 'active_events';
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION dashboard_registrations_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE dashboard_counters SET value = value + 1 WHERE name = 'registrations';
+            UPDATE event_stats SET reg_count = reg_count + 1 WHERE event_id = NEW.event_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE dashboard_counters SET value = value - 1 WHERE name = 'registrations';
+            UPDATE event_stats SET reg_count = reg_count - 1 WHERE event_id = OLD.event_id;
+        ELSE
+            UPDATE dashboard_counters SET value = 0 WHERE name = 'registrations';
+            UPDATE event_stats SET reg_count = 0 WHERE reg_count <> 0;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION dashboard_tickets_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE dashboard_counters SET value = value + 1 WHERE name = 'tickets';
+            UPDATE event_stats SET ticket_count = ticket_count + 1 WHERE event_id = NEW.event_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE dashboard_counters SET value = value - 1 WHERE name = 'tickets';
+            UPDATE event_stats SET ticket_count = ticket_count - 1 WHERE event_id = OLD.event_id;
+        ELSE
+            UPDATE dashboard_counters SET value = 0 WHERE name = 'tickets';
+            UPDATE event_stats SET ticket_count = 0 WHERE ticket_count <> 0;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # Recount everything from scratch; also usable by hand if the summaries are ever suspected to drift
+    """
+    CREATE FUNCTION refresh_dashboard_stats() RETURNS void AS $$
+    BEGIN
+        LOCK TABLE users, blocked_users, events, registrations, tickets IN SHARE MODE;
+        DELETE FROM dashboard_counters;
+        INSERT INTO dashboard_counters (name, value) VALUES
+            ('users', (SELECT count(*) FROM users)),
+            ('blocked_users', (SELECT count(*) FROM blocked_users)),
+            ('active_events', (SELECT count(*) FROM events WHERE active)),
+            ('registrations', (SELECT count(*) FROM registrations)),
+            ('tickets', (SELECT count(*) FROM tickets));
+        DELETE FROM event_stats;
+        INSERT INTO event_stats (event_id, reg_count, ticket_count)
+        SELECT e.id,
+               (SELECT count(*) FROM registrations r WHERE r.event_id = e.id),
+               (SELECT count(*) FROM tickets t WHERE t.event_id = e.id)
+        FROM events e;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+# (table, trigger function, function arguments)
+TRIGGERS = [
+    *[(table, 'dashboard_count_rows', f"'{table}'") for table in COUNTED_TABLES],
+    ('events', 'dashboard_events_stats', ''),
+    ('registrations', 'dashboard_registrations_stats', ''),
+    ('tickets', 'dashboard_tickets_stats', ''),
+]
+
+
+def upgrade() -> None:
+    op.create_table('dashboard_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('event_stats',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('reg_count', sa.BigInteger(), nullable=False),
+    sa.Column('ticket_count', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_index('ix_event_stats_reg_count', 'event_stats', ['reg_count'], unique=False)
+
+    for function in FUNCTIONS:
+        op.execute(function)
+    for table, function, args in TRIGGERS:
+        row_events = 'INSERT OR UPDATE OF active OR DELETE' if table == 'events' else 'INSERT OR DELETE'
+        op.execute(
+            f"CREATE TRIGGER {table}_dashboard_stats AFTER {row_events} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {function}({args})"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_dashboard_stats_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}({args})"
+        )
+    op.execute("SELECT refresh_dashboard_stats()")
+
+
+def downgrade() -> None:
+    for table, _, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER {table}_dashboard_stats_truncate ON {table}")
+        op.execute(f"DROP TRIGGER {table}_dashboard_stats ON {table}")
+    for function in ['refresh_dashboard_stats', 'dashboard_tickets_stats', 'dashboard_registrations_stats',
+                     'dashboard_events_stats', 'dashboard_count_rows']:
+        op.execute(f"DROP FUNCTION {function}")
+    op.drop_index('ix_event_stats_reg_count', table_name='event_stats')
+    op.drop_table('event_stats')
+    op.drop_table('dashboard_counters')
@@ -0,0 +1,65 @@
+"""add_starts_at_to_events
+
+Revision ID: b5d08e3f61c2
+Revises: 7c1e2b9d4a10
+Create Date: 2026-10-17 10:04:51.602337
+
+"""
+from datetime import datetime, time
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d08e3f61c2'
+down_revision: Union[str, None] = '7c1e2b9d4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Formats the free-text events.date column has been filled with (scraper, admin bot flow)
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%y", "%d/%m/%Y")
+
+
+def _starts_at(date_str, time_str):
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(date_str.strip(), fmt).date()
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+    try:
+        start_time = datetime.strptime(time_str.strip(), "%H:%M").time() if time_str else time.min
+    except ValueError:
+        start_time = time.min
+    return datetime.combine(parsed, start_time)
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('starts_at', sa.DateTime(), nullable=True))
+
+    # Backfill parses rows in Python with the same rules as the app; only possible against a live DB
+    if not context.is_offline_mode():
+        bind = op.get_bind()
+        rows = bind.execute(sa.text("SELECT id, date, time FROM events")).all()
+        updates = [
+            {"id": row.id, "starts_at": starts_at}
+            for row in rows
+            if (starts_at := _starts_at(row.date, row.time)) is not None
+        ]
+        if updates:
+            bind.execute(sa.text("UPDATE events SET starts_at = :starts_at WHERE id = :id"), updates)
+
+    op.create_index(
+        'ix_events_upcoming', 'events',
+        [sa.text("coalesce(starts_at, 'infinity'::timestamp)")],
+        unique=False, postgresql_where=sa.text('active'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_upcoming', table_name='events', postgresql_where=sa.text('active'))
+    op.drop_column('events', 'starts_at')
@@ -0,0 +1,36 @@
+"""add_outbox_claims
+
+Revision ID: b9e2f47c1d36
+Revises: d6a1b8c3f925
+Create Date: 2026-10-17 18:21:05.413877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e2f47c1d36'
+down_revision: Union[str, None] = 'd6a1b8c3f925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('outbox', sa.Column('locked_by', sa.String(length=32), nullable=True))
+    op.add_column('outbox', sa.Column('failed_at', sa.DateTime(), nullable=True))
+    # Dead-lettered messages leave the pending index along with delivered ones
+    op.drop_index('ix_outbox_pending', table_name='outbox', postgresql_where=sa.text('sent_at IS NULL'))
+    op.create_index(
+        'ix_outbox_pending', 'outbox', ['id'],
+        unique=False, postgresql_where=sa.text('sent_at IS NULL AND failed_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_pending', table_name='outbox', postgresql_where=sa.text('sent_at IS NULL AND failed_at IS NULL'))
+    op.create_index('ix_outbox_pending', 'outbox', ['id'], unique=False, postgresql_where=sa.text('sent_at IS NULL'))
+    op.drop_column('outbox', 'failed_at')
+    op.drop_column('outbox', 'locked_by')
@@ -0,0 +1,56 @@
+"""add_dashboard_listing_indexes
+
+Revision ID: c9d4f7a2e318
+Revises: a3c6e9f1b254
+Create Date: 2026-10-17 14:48:52.107384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d4f7a2e318'
+down_revision: Union[str, None] = 'a3c6e9f1b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, extra create_index kwargs)
+INDEXES = [
+    # keyset pagination: (sort column, id) so every page is one bounded index range scan
+    ('ix_users_joined_at_id', 'users', ['joined_at', 'telegram_id'], {}),
+    ('ix_users_username_id', 'users', [sa.text("coalesce(username, '')"), 'telegram_id'], {}),
+    ('ix_events_start_id', 'events', [sa.text("coalesce(starts_at, 'infinity'::timestamp)"), 'id'], {}),
+    ('ix_events_name_id', 'events', ['name', 'id'], {}),
+    ('ix_tickets_posted_at_id', 'tickets', ['posted_at', 'id'], {}),
+    # substring search (ILIKE '%q%')
+    ('ix_users_username_trgm', 'users', ['username'],
+     {'postgresql_using': 'gin', 'postgresql_ops': {'username': 'gin_trgm_ops'}}),
+    ('ix_events_name_trgm', 'events', ['name'],
+     {'postgresql_using': 'gin', 'postgresql_ops': {'name': 'gin_trgm_ops'}}),
+]
+
+# Single-column indexes made redundant by the (column, id) ones above
+REPLACED = [
+    ('ix_users_joined_at', 'users', ['joined_at']),
+    ('ix_tickets_posted_at', 'tickets', ['posted_at']),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, **kwargs)
+        for name, table, _ in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,50 @@
+"""add_query_path_indexes
+
+Revision ID: d2a7c4e19b83
+Revises: b5d08e3f61c2
+Create Date: 2026-10-17 11:20:13.448925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c4e19b83'
+down_revision: Union[str, None] = 'b5d08e3f61c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_TICKET = sa.text('deleted_at IS NULL')
+
+# (name, table, columns, partial-index predicate)
+INDEXES = [
+    # get_registered_users / alert recipients: event_id filter, telegram_id order
+    ('ix_registrations_event_telegram', 'registrations', ['event_id', 'telegram_id'], None),
+    # get_active_tickets: event_id + deleted_at IS NULL, ORDER BY posted_at
+    ('ix_tickets_event_active', 'tickets', ['event_id', 'posted_at'], ACTIVE_TICKET),
+    # get_seller_tickets: seller + deleted_at IS NULL, ORDER BY posted_at
+    ('ix_tickets_seller_active', 'tickets', ['seller_telegram_id', 'posted_at'], ACTIVE_TICKET),
+    # foreign keys / per-event and per-seller ticket counts on the dashboard
+    ('ix_tickets_event_id', 'tickets', ['event_id'], None),
+    ('ix_tickets_seller_telegram_id', 'tickets', ['seller_telegram_id'], None),
+    # dashboard listings ordered by time
+    ('ix_tickets_posted_at', 'tickets', ['posted_at'], None),
+    ('ix_users_joined_at', 'users', ['joined_at'], None),
+    ('ix_blocked_users_blocked_at', 'blocked_users', ['blocked_at'], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps registrations/tickets writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_where=where, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,54 @@
+"""add_activity_rollups
+
+Revision ID: d6a1b8c3f925
+Revises: c9d4f7a2e318
+Create Date: 2026-10-17 15:37:12.648190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6a1b8c3f925'
+down_revision: Union[str, None] = 'c9d4f7a2e318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial-index predicate): range scans over the timestamps rolled up
+INDEXES = [
+    ('ix_registrations_registered_at', 'registrations', ['registered_at'], None),
+    ('ix_tickets_deleted_at', 'tickets', ['deleted_at'], sa.text('deleted_at IS NOT NULL')),
+    ('ix_outbox_sent_at', 'outbox', ['sent_at'], sa.text('sent_at IS NOT NULL')),
+]
+
+
+def upgrade() -> None:
+    op.create_table('activity_rollups',
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'metric', 'bucket')
+    )
+    rollup_state = op.create_table('rollup_state',
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('frozen_until', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('granularity')
+    )
+    # NULL frozen_until: the first refresh rolls up the whole history
+    op.bulk_insert(rollup_state, [{'granularity': 'hour'}, {'granularity': 'day'}])
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_where=where, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    op.drop_table('rollup_state')
+    op.drop_table('activity_rollups')
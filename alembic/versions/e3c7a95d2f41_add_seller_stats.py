@@ -0,0 +1,91 @@
+"""add_seller_stats
+
+Revision ID: e3c7a95d2f41
+Revises: b9e2f47c1d36
+Create Date: 2026-10-17 19:02:44.930512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3c7a95d2f41'
+down_revision: Union[str, None] = 'b9e2f47c1d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SELLER_STATS_FUNCTION = """
+    CREATE FUNCTION dashboard_seller_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO seller_stats (seller_telegram_id, ticket_count) VALUES (NEW.seller_telegram_id, 1)
+            ON CONFLICT (seller_telegram_id) DO UPDATE SET ticket_count = seller_stats.ticket_count + 1;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE seller_stats SET ticket_count = ticket_count - 1 WHERE seller_telegram_id = OLD.seller_telegram_id;
+        ELSE
+            DELETE FROM seller_stats;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# refresh_dashboard_stats() from a3c6e9f1b254, extended to recount seller_stats
+REFRESH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION refresh_dashboard_stats() RETURNS void AS $$
+    BEGIN
+        LOCK TABLE users, blocked_users, events, registrations, tickets IN SHARE MODE;
+        DELETE FROM dashboard_counters;
+        INSERT INTO dashboard_counters (name, value) VALUES
+            ('users', (SELECT count(*) FROM users)),
+            ('blocked_users', (SELECT count(*) FROM blocked_users)),
+            ('active_events', (SELECT count(*) FROM events WHERE active)),
+            ('registrations', (SELECT count(*) FROM registrations)),
+            ('tickets', (SELECT count(*) FROM tickets));
+        DELETE FROM event_stats;
+        INSERT INTO event_stats (event_id, reg_count, ticket_count)
+        SELECT e.id,
+               (SELECT count(*) FROM registrations r WHERE r.event_id = e.id),
+               (SELECT count(*) FROM tickets t WHERE t.event_id = e.id)
+        FROM events e;{sellers}
+    END
+    $$ LANGUAGE plpgsql
+"""
+RECOUNT_SELLERS = """
+        DELETE FROM seller_stats;
+        INSERT INTO seller_stats (seller_telegram_id, ticket_count)
+        SELECT seller_telegram_id, count(*) FROM tickets GROUP BY seller_telegram_id;"""
+
+
+def upgrade() -> None:
+    op.create_table('seller_stats',
+    sa.Column('seller_telegram_id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('ticket_count', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['seller_telegram_id'], ['users.telegram_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('seller_telegram_id')
+    )
+    op.create_index('ix_seller_stats_ticket_count', 'seller_stats', ['ticket_count'], unique=False)
+
+    op.execute(SELLER_STATS_FUNCTION)
+    op.execute(REFRESH_FUNCTION.format(sellers=RECOUNT_SELLERS))
+    op.execute(
+        "CREATE TRIGGER tickets_seller_stats AFTER INSERT OR DELETE ON tickets "
+        "FOR EACH ROW EXECUTE FUNCTION dashboard_seller_stats()"
+    )
+    op.execute(
+        "CREATE TRIGGER tickets_seller_stats_truncate AFTER TRUNCATE ON tickets "
+        "FOR EACH STATEMENT EXECUTE FUNCTION dashboard_seller_stats()"
+    )
+    op.execute("SELECT refresh_dashboard_stats()")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER tickets_seller_stats_truncate ON tickets")
+    op.execute("DROP TRIGGER tickets_seller_stats ON tickets")
+    op.execute(REFRESH_FUNCTION.format(sellers=""))
+    op.execute("DROP FUNCTION dashboard_seller_stats")
+    op.drop_index('ix_seller_stats_ticket_count', table_name='seller_stats')
+    op.drop_table('seller_stats')
@@ -0,0 +1,32 @@
+"""add_processed_updates
+
+Revision ID: e8f3a1c5d720
+Revises: d2a7c4e19b83
+Create Date: 2026-10-17 12:41:07.915730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f3a1c5d720'
+down_revision: Union[str, None] = 'd2a7c4e19b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('processed_updates',
+    sa.Column('update_id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('update_id')
+    )
+    op.create_index('ix_processed_updates_received_at', 'processed_updates', ['received_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_processed_updates_received_at', table_name='processed_updates')
+    op.drop_table('processed_updates')
@@ -0,0 +1,36 @@
+"""add_fsm_states
+
+Revision ID: f4b9d2e6a137
+Revises: e8f3a1c5d720
+Create Date: 2026-10-17 13:22:48.306154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b9d2e6a137'
+down_revision: Union[str, None] = 'e8f3a1c5d720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('fsm_states',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('state', sa.String(length=255), nullable=True),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_fsm_states_expires_at', 'fsm_states', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fsm_states_expires_at', table_name='fsm_states')
+    op.drop_table('fsm_states')
@@ -0,0 +1,18 @@
+"""Benchmarks and query-plan checks that run against a scratch Postgres database.
+
+Everything here TRUNCATEs and reseeds the target database, so it refuses to run unless
+BENCH_DATABASE_URL is set; it is used in place of DATABASE_URL for the whole process.
+Apply migrations to that database first:
+
+    DATABASE_URL=$BENCH_DATABASE_URL alembic upgrade head
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.explain_check
+"""
+
+import os
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "")
+if not BENCH_DATABASE_URL:
+    raise SystemExit("Set BENCH_DATABASE_URL to a scratch database (its tables are truncated).")
+
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+os.environ.setdefault("BOT_TOKEN", "0:benchmark")
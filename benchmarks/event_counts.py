@@ -0,0 +1,116 @@
+"""Compare the old fan-out events aggregate with the current ``get_all_events`` on one hot event.
+
+The old query outer-joined registrations and tickets onto events and deduplicated with
+count(DISTINCT ...), so an event with R registrations and T tickets produced R x T rows.
+This adds one event with ``--registrations`` registrations and ``--tickets`` tickets on top of
+the regular seed, then prints EXPLAIN ANALYZE for both queries restricted to that event and
+checks that they return the same counts.
+
+    python -m benchmarks.event_counts [--no-seed] [--registrations 20000] [--tickets 300]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import event as sa_event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from benchmarks.seed import SeedSize, seed
+from src.db.models import Event, Registration, Ticket
+from src.db.session import engine
+from src.dashboard import stats
+
+
+def fanout_query(event_name: str):
+    """``get_all_events`` as it was before it read ``event_stats``."""
+    return (
+        select(
+            Event.id, Event.name, Event.date, Event.time, Event.location,
+            Event.active, Event.created_at,
+            func.count(func.distinct(Registration.id)).label("reg_count"),
+            func.count(func.distinct(Ticket.id)).label("ticket_count"),
+        )
+        .outerjoin(Registration, Registration.event_id == Event.id)
+        .outerjoin(Ticket, Ticket.event_id == Event.id)
+        .where(Event.name == event_name)
+        .group_by(Event.id)
+    )
+
+
+async def add_hot_event(conn: AsyncConnection, registrations: int, tickets: int) -> str:
+    """Insert one event with the given number of registrations and tickets; returns its unique name."""
+    event_id = (await conn.execute(text("""
+        INSERT INTO events (name, date, time, location, starts_at, created_at, active)
+        VALUES ('Hot event', to_char(current_date, 'YYYY-MM-DD'), '20:00', 'Stadium', now(), now(), true)
+        RETURNING id
+    """))).scalar_one()
+    name = f"Hot event #{event_id}#"
+    await conn.execute(text("UPDATE events SET name = :name WHERE id = :id"), {"name": name, "id": event_id})
+    users = (await conn.execute(text("SELECT count(*) FROM users"))).scalar_one()
+    if users < registrations:
+        raise SystemExit(f"Need at least {registrations} users in the database, found {users}")
+    await conn.execute(text("""
+        INSERT INTO registrations (telegram_id, event_id, registered_at)
+        SELECT telegram_id, :event_id, now() FROM users ORDER BY telegram_id LIMIT :n
+    """), {"event_id": event_id, "n": registrations})
+    await conn.execute(text("""
+        INSERT INTO tickets (event_id, seller_telegram_id, description, posted_at)
+        SELECT :event_id, telegram_id, 'Hot section', now() FROM users ORDER BY telegram_id LIMIT :n
+    """), {"event_id": event_id, "n": tickets})
+    for table in ("events", "registrations", "tickets", "event_stats"):
+        await conn.execute(text(f"ANALYZE {table}"))
+    return name
+
+
+async def explain(conn: AsyncConnection, statement: str, parameters) -> list[str]:
+    result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+    return [row[0] for row in result]
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--registrations", type=int, default=20_000)
+    parser.add_argument("--tickets", type=int, default=300)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        if not args.no_seed:
+            await seed(conn, SeedSize(users=max(SeedSize.users, args.registrations)))
+        name = await add_hot_event(conn, args.registrations, args.tickets)
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    async with engine.connect() as conn:
+        # Listen only once connected, so connection setup statements aren't captured
+        sa_event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        session = AsyncSession(bind=conn)
+        old_rows = (await session.execute(fanout_query(name))).all()
+        page = await stats.get_all_events(session, search=name)
+        sa_event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        (old_sql, old_params), (new_sql, new_params) = captured
+        for label, sql, params in (("old: outer joins + count(DISTINCT)", old_sql, old_params),
+                                   ("new: get_all_events", new_sql, new_params)):
+            print(f"=== {label} ===")
+            print("\n".join(await explain(conn, sql, params)))
+            print()
+        await session.close()
+
+    await engine.dispose()
+
+    old = [(r.reg_count, r.ticket_count) for r in old_rows]
+    new = [(r["reg_count"], r["ticket_count"]) for r in page.rows]
+    print(f"{name}: old counts {old}, new counts {new}")
+    if old != new:
+        print("Counts differ")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,172 @@
+"""Fail if any repository or dashboard query plans a sequential scan on a large table.
+
+Every function below is run for real inside a transaction that is rolled back at the end;
+each statement it issues is captured and re-planned with EXPLAIN. A Seq Scan on a table
+with more than ``--min-rows`` rows fails the check unless that function is expected to read
+the whole table (the ``full_scan`` column).
+
+    python -m benchmarks.explain_check [--no-seed] [seed sizes...]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import event as sa_event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from benchmarks.seed import add_size_arguments, seed, size_from_args
+from src.db import repositories as repo
+from src.db.session import engine
+from src.dashboard import stats
+
+
+@dataclass
+class Sample:
+    """Ids that exist in the seeded data, used as arguments to the checked functions."""
+    event_id: int
+    telegram_id: int
+    seller_id: int
+    ticket_id: int
+
+
+@dataclass
+class Check:
+    name: str
+    run: Callable[[AsyncSession, Sample], Awaitable]
+    full_scan: set[str] = field(default_factory=set)
+
+
+CHECKS = [
+    # --- repositories ---
+    Check("upsert_user", lambda s, x: repo.upsert_user(s, x.telegram_id, "bench", "Bench")),
+    Check("upsert_users", lambda s, x: repo.upsert_users(s, [(x.telegram_id, "bench", "Bench"), (x.seller_id, "b", "B")])),
+    Check("is_blocked", lambda s, x: repo.is_blocked(s, x.telegram_id)),
+    Check("block_user", lambda s, x: repo.block_user(s, x.telegram_id, "bench")),
+    Check("unblock_user", lambda s, x: repo.unblock_user(s, x.telegram_id)),
+    Check("get_active_events", lambda s, x: repo.get_active_events(s, limit=5)),
+    Check("get_event", lambda s, x: repo.get_event(s, x.event_id)),
+    Check("remove_event", lambda s, x: repo.remove_event(s, x.event_id)),
+    Check("register_for_event", lambda s, x: repo.register_for_event(s, x.telegram_id, x.event_id)),
+    Check("unregister_from_event", lambda s, x: repo.unregister_from_event(s, x.telegram_id, x.event_id)),
+    Check("get_user_registrations", lambda s, x: repo.get_user_registrations(s, x.telegram_id)),
+    Check("get_registered_users", lambda s, x: repo.get_registered_users(s, x.event_id)),
+    Check("get_alert_recipients_page", lambda s, x: repo.get_alert_recipients_page(s, x.event_id, x.seller_id, x.telegram_id)),
+    Check("add_ticket", lambda s, x: repo.add_ticket(s, x.event_id, x.seller_id, "bench", alert_text="bench")),
+    Check("get_ticket", lambda s, x: repo.get_ticket(s, x.ticket_id)),
+    Check("get_active_tickets", lambda s, x: repo.get_active_tickets(s, x.event_id)),
+    Check("get_seller_tickets", lambda s, x: repo.get_seller_tickets(s, x.seller_id)),
+    Check("delete_ticket", lambda s, x: repo.delete_ticket(s, x.ticket_id, notice_text="bench")),
+    Check("claim_outbox_messages", lambda s, x: repo.claim_outbox_messages(s, 10, 60)),
+    Check("set_fsm_state", lambda s, x: repo.set_fsm_state(s, f"fsm:{x.telegram_id}:{x.telegram_id}", "bench", 60)),
+    Check("get_fsm_record", lambda s, x: repo.get_fsm_record(s, f"fsm:{x.telegram_id}:{x.telegram_id}")),
+    Check("prune_fsm_records", lambda s, x: repo.prune_fsm_records(s, 1000)),
+    # --- dashboard stats (whole-table aggregates and listings) ---
+    Check("get_overview_stats", lambda s, x: stats.get_overview_stats(s)),
+    Check("get_top_events", lambda s, x: stats.get_top_events(s)),
+    Check("get_all_users", lambda s, x: stats.get_all_users(s)),
+    Check("get_all_users:username", lambda s, x: stats.get_all_users(s, sort="username", descending=False)),
+    Check("get_all_users:search", lambda s, x: stats.get_all_users(s, search=f"user{x.telegram_id}")),
+    Check("get_user_growth", lambda s, x: stats.get_user_growth(s)),
+    Check("get_activity", lambda s, x: stats.get_activity(s, "hour", datetime.utcnow() - timedelta(days=2))),
+    Check("get_all_events", lambda s, x: stats.get_all_events(s)),
+    Check("get_all_events:search", lambda s, x: stats.get_all_events(s, search="Event 1")),
+    Check("get_all_tickets", lambda s, x: stats.get_all_tickets(s)),
+    Check("get_all_tickets:search", lambda s, x: stats.get_all_tickets(s, search=str(x.seller_id))),
+    Check("get_all_tickets:search_name", lambda s, x: stats.get_all_tickets(s, search="Event 1")),
+    Check("get_top_sellers", lambda s, x: stats.get_top_sellers(s)),
+    Check("get_blocked_users", lambda s, x: stats.get_blocked_users(s), {"blocked_users"}),
+]
+
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def _seq_scans(plan: dict):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+async def pick_sample(conn: AsyncConnection) -> Sample:
+    row = (await conn.execute(text("""
+        SELECT r.event_id, r.telegram_id, t.seller_telegram_id, t.id
+        FROM registrations r
+        JOIN tickets t ON t.event_id = r.event_id AND t.deleted_at IS NULL
+        WHERE r.telegram_id NOT IN (SELECT telegram_id FROM blocked_users)
+        ORDER BY r.event_id
+        LIMIT 1
+    """))).one()
+    return Sample(*row)
+
+
+async def run_checks(min_rows: int) -> list[str]:
+    captured: list[tuple[str, tuple]] = []
+    capturing = False
+
+    @sa_event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if capturing and statement.lstrip().upper().startswith(EXPLAINABLE):
+            captured.append((statement, parameters))
+
+    failures = []
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        reltuples = dict((await conn.execute(text("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"))).all())
+        sample = await pick_sample(conn)
+        session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+
+        for check in CHECKS:
+            captured.clear()
+            capturing = True
+            try:
+                await check.run(session, sample)
+            finally:
+                capturing = False
+
+            offenders = set()
+            for statement, parameters in captured:
+                result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = result.scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                for table in _seq_scans(plan[0]["Plan"]):
+                    if table not in check.full_scan and reltuples.get(table, 0) > min_rows:
+                        offenders.add(table)
+
+            status = f"SEQ SCAN on {', '.join(sorted(offenders))}" if offenders else "ok"
+            print(f"{check.name:<28} {len(captured):>2} statements  {status}")
+            if offenders:
+                failures.append(check.name)
+
+        await session.close()
+        await transaction.rollback()
+
+    sa_event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return failures
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--min-rows", type=int, default=10_000, help="ignore seq scans on smaller tables")
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        async with engine.begin() as conn:
+            await seed(conn, size_from_args(args))
+
+    failures = await run_checks(args.min_rows)
+    await engine.dispose()
+    if failures:
+        print(f"\n{len(failures)} queries regressed to a sequential scan: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
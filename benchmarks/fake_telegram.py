@@ -0,0 +1,182 @@
+"""Stand-in Telegram Bot API server for load tests: records every call and can inject latency and 429s.
+
+It answers the methods the bot uses (sendMessage, editMessageText, answerCallbackQuery,
+getMe, getUpdates, webhook management) with minimal valid results and keeps a log of every
+call. ``benchmarks.load_test`` runs it in-process; it can also run on its own next to a bot
+process started with TELEGRAM_API_URL pointing at it:
+
+    python -m benchmarks.fake_telegram [--port 8081] [--latency 40] [--flood-rate 30]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Methods subject to the injected rate limiting, like Telegram's own flood control
+SEND_METHODS = {"sendmessage", "editmessagetext"}
+
+BOT_USER = {"id": 0, "is_bot": True, "first_name": "TickAlert", "username": "tickalert_benchmark_bot"}
+
+
+@dataclass
+class ApiCall:
+    method: str
+    chat_id: int | None
+    text: str | None
+    at: float  # time.perf_counter() when the request arrived
+    status: int
+
+
+class FakeTelegram:
+    """Bot API stand-in.
+
+    Every response is delayed by ``latency`` seconds plus up to ``jitter`` more. Sends are
+    answered with 429 / ``retry_after`` with probability ``error_rate``, and whenever more than
+    ``flood_rate`` sends were accepted during the last second (0 disables either). Updates given
+    to ``push_update`` are served to long polling through getUpdates.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.calls: list[ApiCall] = []
+        self.chat_calls: dict[int, list[ApiCall]] = {}
+        self._accepted_sends: deque[float] = deque()
+        self._updates: list[dict] = []
+        self._updates_ready = asyncio.Event()
+        self._message_ids = 0
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_route("*", "/bot{token}/{method}", self._handle)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> str:
+        """Start listening; returns the base URL to use as TELEGRAM_API_URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def push_update(self, update: dict):
+        self._updates.append(update)
+        self._updates_ready.set()
+
+    def _throttled(self, method: str, now: float) -> bool:
+        if method not in SEND_METHODS:
+            return False
+        if self.error_rate and random.random() < self.error_rate:
+            return True
+        if self.flood_rate:
+            while self._accepted_sends and now - self._accepted_sends[0] > 1.0:
+                self._accepted_sends.popleft()
+            if len(self._accepted_sends) >= self.flood_rate:
+                return True
+            self._accepted_sends.append(now)
+        return False
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        now = time.perf_counter()
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        params.update(request.query)
+        chat_id = int(params["chat_id"]) if "chat_id" in params else None
+        throttled = self._throttled(method.lower(), now)
+
+        call = ApiCall(method, chat_id, params.get("text"), now, 429 if throttled else 200)
+        self.calls.append(call)
+        if chat_id is not None:
+            self.chat_calls.setdefault(chat_id, []).append(call)
+
+        if method.lower() == "getupdates":
+            return web.json_response({"ok": True, "result": await self._get_updates(params)})
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.random() * self.jitter)
+        if throttled:
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+        return web.json_response({"ok": True, "result": self._result(method.lower(), chat_id, params)})
+
+    def _result(self, method: str, chat_id: int | None, params: dict):
+        if method == "getme":
+            return BOT_USER
+        if method in SEND_METHODS:
+            if method == "sendmessage":
+                self._message_ids += 1
+                message_id = self._message_ids
+            else:
+                message_id = int(params.get("message_id", 0))
+            return {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        return True
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._updates_ready.clear()
+            try:
+                await asyncio.wait_for(self._updates_ready.wait(), timeout=float(params.get("timeout", 0)))
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency up to this many ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of sends answered with 429")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="sends/s above which 429 is returned")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeTelegram(args.latency / 1000, args.jitter / 1000, args.error_rate, args.flood_rate, args.retry_after)
+    url = await fake.start(args.host, args.port)
+    logger.info("Fake Bot API listening on %s", url)
+    try:
+        while True:
+            await asyncio.sleep(10)
+            throttled = sum(call.status == 429 for call in fake.calls)
+            logger.info("%d calls so far, %d answered with 429", len(fake.calls), throttled)
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
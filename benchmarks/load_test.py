@@ -0,0 +1,337 @@
+"""End-to-end load test: synthetic users and sellers drive the real dispatcher against a fake Bot API.
+
+``FakeTelegram`` runs in-process on TELEGRAM_API_URL (default http://127.0.0.1:8081) and
+``--clients`` virtual users replay a match-day mix, each waiting for its previous update to be
+handled before sending the next. Browsers open the event list, pick an event (mostly the
+first, i.e. the next match), register for alerts and look at its tickets. A ``--seller-share``
+of them run the whole sell flow instead, so the outbox fans each new ticket alert out to
+the event's registrants. Updates go through ``webhook_handler`` over ASGI (``--mode webhook``,
+using the ingest queue unless WEBHOOK_WORKERS=0), through long polling (``--mode polling``) or
+straight into ``Dispatcher.feed_update`` with no transport at all (``--mode direct``).
+
+Reports updates/s, handler and end-to-end latency per step, time to the first reply, and
+alert delivery time from the seller's last message to each recipient's sendMessage. Alert
+fan-out runs at the configured BROADCAST_RATE; raise it to load-test against ``--flood-rate``.
+
+    python -m benchmarks.load_test [--no-seed] [--mode webhook|polling|direct] [--clients 200]
+        [--seller-share 0.1] [--latency 40] [--flood-rate 30] [seed sizes...]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import benchmarks  # noqa: F401  (points DATABASE_URL at BENCH_DATABASE_URL)
+
+os.environ.setdefault("TELEGRAM_API_URL", "http://127.0.0.1:8081")
+
+import httpx
+from aiogram.types import Update
+from sqlalchemy import func, select
+
+from benchmarks.fake_telegram import BOT_USER, FakeTelegram
+from benchmarks.seed import add_size_arguments, seed, size_from_args
+from src.config import TELEGRAM_API_URL, WEBHOOK_SECRET, WEBHOOK_WORKERS
+from src.db.blocked_cache import blocked_cache
+from src.db.fsm_storage import fsm_storage
+from src.db.models import BlockedUser, OutboxMessage, User
+from src.db.session import async_session, engine
+from src.db.user_buffer import user_buffer
+from src.db import repositories as repo
+from src.dedup import deduplicator
+from src.ingest import update_queue
+from src.outbox import outbox
+from src import main as bot_app
+
+ALERT_MARKER = "כרטיס חדש זמין"
+
+
+@dataclass
+class Step:
+    label: str
+    update_id: int
+    chat_id: int
+    submitted: float
+    handler: float | None = None  # seconds inside the dispatcher
+    completed: float | None = None
+    reply: float | None = None  # seconds from submission to the first Bot API call for the chat
+    error: bool = False
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile; 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+class LoadTest:
+    """Submits updates in one mode and records when the dispatcher finished each of them."""
+
+    def __init__(self, fake: FakeTelegram, mode: str, step_timeout: float, think: float):
+        self.fake = fake
+        self.mode = mode
+        self.step_timeout = step_timeout
+        self.think = think
+        self.steps: list[Step] = []
+        self.alerts: dict[str, tuple[int, float]] = {}  # phone -> (seller, submitted)
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._done: dict[int, asyncio.Event] = {}
+        self._running: dict[int, Step] = {}
+        self._client: httpx.AsyncClient | None = None
+
+    async def timing_middleware(self, handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            step = self._running.get(event.update_id)
+            if step is not None:
+                step.error = True
+            raise
+        finally:
+            step = self._running.pop(event.update_id, None)
+            if step is not None:
+                step.handler = time.perf_counter() - started
+                step.completed = time.perf_counter()
+                self._done.pop(event.update_id).set()
+
+    async def __aenter__(self):
+        if self.mode == "webhook":
+            self._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=bot_app.app), base_url="http://bench")
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def send(self, label: str, chat_id: int, update: dict) -> Step:
+        update_id = next(self._update_ids)
+        update["update_id"] = update_id
+        step = Step(label, update_id, chat_id, time.perf_counter())
+        self.steps.append(step)
+        self._running[update_id] = step
+        done = self._done[update_id] = asyncio.Event()
+        seen = len(self.fake.chat_calls.get(chat_id, ()))
+
+        try:
+            if self.mode == "webhook":
+                response = await self._client.post(
+                    "/webhook", json=update, headers={"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET},
+                )
+                step.error = step.error or response.status_code != 200
+            elif self.mode == "polling":
+                self.fake.push_update(update)
+            else:
+                await bot_app.dp.feed_update(bot_app.bot, Update.model_validate(update, context={"bot": bot_app.bot}))
+            await asyncio.wait_for(done.wait(), timeout=self.step_timeout)
+        except Exception:
+            step.error = True
+            self._running.pop(update_id, None)
+            self._done.pop(update_id, None)
+
+        calls = self.fake.chat_calls.get(chat_id, ())
+        if len(calls) > seen:
+            step.reply = calls[seen].at - step.submitted
+        if self.think:
+            await asyncio.sleep(random.random() * self.think)
+        return step
+
+    def message(self, user: dict, text: str) -> dict:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user["id"], "type": "private", "first_name": user["first_name"]},
+            "from": user,
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return {"message": message}
+
+    def callback(self, user: dict, data: str) -> dict:
+        return {"callback_query": {
+            "id": str(next(self._message_ids)),
+            "from": user,
+            "chat_instance": str(user["id"]),
+            "data": data,
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user["id"], "type": "private", "first_name": user["first_name"]},
+                "from": BOT_USER,
+                "text": "...",
+            },
+        }}
+
+    async def browse(self, user: dict, event_id: int):
+        chat = user["id"]
+        await self.send("start", chat, self.message(user, "/start"))
+        await self.send("events", chat, self.message(user, "🔎 מחפש כרטיס"))
+        await self.send("event", chat, self.callback(user, f"event_{event_id}"))
+        await self.send("register", chat, self.callback(user, f"reg_{event_id}"))
+        await self.send("view_tickets", chat, self.callback(user, f"viewtickets_{event_id}"))
+        await self.send("my_events", chat, self.message(user, "📋 אירועים שנרשמתי להתראות"))
+
+    async def sell(self, user: dict, event_id: int):
+        chat = user["id"]
+        phone = f"05{chat % 10 ** 8:08d}"
+        await self.send("sell", chat, self.message(user, "💰 מוכר כרטיס"))
+        await self.send("sell_event", chat, self.callback(user, f"sell_{event_id}"))
+        await self.send("sell_section", chat, self.message(user, f"Gate {chat % 12 + 1}"))
+        await self.send("sell_quantity", chat, self.message(user, str(chat % 4 + 1)))
+        await self.send("sell_price", chat, self.message(user, "150"))
+        step = await self.send("sell_phone", chat, self.message(user, phone))
+        self.alerts[phone] = (chat, step.submitted)
+
+    def alert_deliveries(self) -> list[float]:
+        """Seconds from each alert's triggering update to every sendMessage that delivered it."""
+        delivered = []
+        for call in self.fake.calls:
+            if call.method.lower() != "sendmessage" or call.status != 200 or ALERT_MARKER not in (call.text or ""):
+                continue
+            for phone, (seller, submitted) in self.alerts.items():
+                if phone in call.text and call.chat_id != seller:
+                    delivered.append(call.at - submitted)
+                    break
+        return delivered
+
+
+async def pending_alerts() -> int:
+    async with async_session() as session:
+        return await session.scalar(
+            select(func.count()).select_from(OutboxMessage)
+            .where(OutboxMessage.sent_at.is_(None), OutboxMessage.failed_at.is_(None))
+        )
+
+
+async def load_clients(count: int) -> tuple[list[dict], list[int]]:
+    """The first ``count`` unblocked seeded users as Telegram senders, and the ids of the listed events."""
+    async with async_session() as session:
+        rows = (await session.execute(
+            select(User.telegram_id, User.username, User.first_name)
+            .where(User.telegram_id.not_in(select(BlockedUser.telegram_id)))
+            .order_by(User.telegram_id)
+            .limit(count)
+        )).all()
+        events = await repo.get_active_events(session, limit=5)
+    users = [
+        {"id": r.telegram_id, "is_bot": False, "first_name": r.first_name or "User", "username": r.username}
+        for r in rows
+    ]
+    return users, [e.id for e in events]
+
+
+def report(test: LoadTest, elapsed: float, deliveries: list[float], fake: FakeTelegram):
+    steps = test.steps
+    errors = sum(step.error for step in steps)
+    print(f"mode: {test.mode}, {len(steps)} updates in {elapsed:.2f}s = {len(steps) / elapsed:.1f} updates/s, {errors} errors")
+    print(f"{'step':<15}{'count':>7}{'handler p50':>13}{'p99':>9}{'e2e p50':>10}{'p99':>9}  (ms)")
+    by_label = defaultdict(list)
+    for step in steps:
+        by_label[step.label].append(step)
+    for label, group in [("all", steps), *sorted(by_label.items())]:
+        handler = [s.handler * 1000 for s in group if s.handler is not None]
+        e2e = [(s.completed - s.submitted) * 1000 for s in group if s.completed is not None]
+        print(f"{label:<15}{len(group):>7}{percentile(handler, 50):>13.1f}{percentile(handler, 99):>9.1f}"
+              f"{percentile(e2e, 50):>10.1f}{percentile(e2e, 99):>9.1f}")
+    replies = [s.reply * 1000 for s in steps if s.reply is not None]
+    print(f"first reply: p50 {percentile(replies, 50):.1f} ms, p99 {percentile(replies, 99):.1f} ms")
+
+    throttled = sum(call.status == 429 for call in fake.calls)
+    print(f"Bot API: {len(fake.calls)} calls, {throttled} answered with 429")
+    if test.alerts:
+        print(f"alerts: {len(test.alerts)} posted, {len(deliveries)} deliveries, "
+              f"p50 {percentile(deliveries, 50):.2f}s, p99 {percentile(deliveries, 99):.2f}s, "
+              f"last {max(deliveries, default=0):.2f}s")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--mode", choices=["webhook", "polling", "direct"], default="webhook")
+    parser.add_argument("--clients", type=int, default=200, help="concurrent virtual users")
+    parser.add_argument("--seller-share", type=float, default=0.1, help="share of clients that post a ticket")
+    parser.add_argument("--think", type=float, default=0.0, help="random pause of up to this many seconds between steps")
+    parser.add_argument("--step-timeout", type=float, default=30.0)
+    parser.add_argument("--drain-timeout", type=float, default=300.0, help="seconds to wait for alert fan-out")
+    parser.add_argument("--latency", type=float, default=0.0, help="Bot API latency, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random Bot API latency up to this many ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of sends answered with 429")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="sends/s above which the Bot API answers 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        async with engine.begin() as conn:
+            await seed(conn, size_from_args(args))
+
+    fake = FakeTelegram(args.latency / 1000, args.jitter / 1000, args.error_rate, args.flood_rate, args.retry_after)
+    address = urlsplit(TELEGRAM_API_URL)
+    await fake.start(address.hostname, address.port)
+
+    bot, dp = bot_app.bot, bot_app.dp
+    test = LoadTest(fake, args.mode, args.step_timeout, args.think)
+    dp.update.outer_middleware(test.timing_middleware)
+
+    # on_startup without the leader duties (webhook registration, event sync, rollups)
+    await blocked_cache.refresh()
+    outbox.start(bot)
+    user_buffer.start()
+    if dp.storage is fsm_storage:
+        fsm_storage.start()
+    polling = None
+    if args.mode == "webhook":
+        deduplicator.start()
+        if WEBHOOK_WORKERS > 0:
+            update_queue.start(dp, bot)
+    elif args.mode == "polling":
+        polling = asyncio.create_task(dp.start_polling(bot, polling_timeout=1, handle_signals=False))
+
+    users, event_ids = await load_clients(args.clients)
+    if not event_ids:
+        raise SystemExit("No active events to load-test against")
+    sellers = round(len(users) * args.seller_share)
+
+    async def client(index: int, user: dict):
+        # Most traffic goes to the next match, the rest is spread over the other listed events
+        event_id = event_ids[0] if random.random() < 0.7 else random.choice(event_ids)
+        if index < sellers:
+            await test.sell(user, event_id)
+        else:
+            await test.browse(user, event_id)
+
+    try:
+        async with test:
+            started = time.perf_counter()
+            await asyncio.gather(*(client(i, user) for i, user in enumerate(users)))
+            elapsed = time.perf_counter() - started
+
+        deadline = time.monotonic() + args.drain_timeout
+        outbox.wake()
+        while await pending_alerts() and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        report(test, elapsed, test.alert_deliveries(), fake)
+    finally:
+        if polling is not None:
+            await dp.stop_polling()
+            await polling
+        await bot_app.on_shutdown()
+        await bot.session.close()
+        await fake.stop()
+        await engine.dispose()
+    return 1 if any(step.error for step in test.steps) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,140 @@
+"""Fail if any bot handler issues more SQL statements per update than its budget.
+
+Scripted users (browse and register, sell a ticket, then manage and delete it) are fed
+straight into the real dispatcher one update at a time, with the Bot API answered by
+``FakeTelegram``. Every statement executed while an update is handled counts against that
+step's entry in ``BUDGETS``, including the FSM storage reads and writes and the first-sighting
+user upsert, so a per-recipient or per-row query loop shows up as a failure long before it
+shows up in production.
+
+    python -m benchmarks.query_budget [--no-seed] [--users-per-flow 3] [seed sizes...]
+"""
+
+import argparse
+import asyncio
+import sys
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from sqlalchemy import event as sa_event, select
+
+from benchmarks.load_test import LoadTest, load_clients
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.seed import add_size_arguments, seed, size_from_args
+from src.config import TELEGRAM_API_URL
+from src.db.blocked_cache import blocked_cache
+from src.db.models import Ticket
+from src.db.session import async_session, engine
+from src import main as bot_app
+
+# Maximum statements per update. Most handlers pay one FSM state read (cached for FSM_CACHE_TTL);
+# the first update from a user also pays the profile upsert.
+BUDGETS = {
+    "start": 2,
+    "events": 2,
+    "event": 3,
+    "register": 3,
+    "view_tickets": 3,
+    "my_events": 2,
+    "sell": 3,
+    "sell_event": 5,
+    "sell_section": 4,
+    "sell_quantity": 4,
+    "sell_price": 4,
+    "sell_phone": 8,
+    "my_tickets": 2,
+    "delete_ticket": 6,
+    "unregister": 3,
+    "back_events": 2,
+}
+
+_statements: ContextVar[list[int] | None] = ContextVar("statements", default=None)
+
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class BudgetTest(LoadTest):
+    """``LoadTest`` in direct mode that records how many statements each step issued."""
+
+    def __init__(self, fake: FakeTelegram):
+        super().__init__(fake, "direct", step_timeout=30, think=0)
+        self.used: dict[str, int] = {}
+
+    async def send(self, label, chat_id, update):
+        counter = [0]
+        token = _statements.set(counter)
+        try:
+            return await super().send(label, chat_id, update)
+        finally:
+            _statements.reset(token)
+            self.used[label] = max(self.used.get(label, 0), counter[0])
+
+    async def manage(self, user: dict, event_id: int):
+        chat = user["id"]
+        async with async_session() as session:
+            ticket_id = await session.scalar(
+                select(Ticket.id).where(Ticket.seller_telegram_id == chat, Ticket.deleted_at.is_(None))
+                .order_by(Ticket.id.desc()).limit(1)
+            )
+        await self.send("my_tickets", chat, self.message(user, "🎟 כרטיסים שפרסמתי"))
+        if ticket_id is not None:
+            await self.send("delete_ticket", chat, self.callback(user, f"delticket_{ticket_id}"))
+        await self.send("unregister", chat, self.callback(user, f"unreg_{event_id}"))
+        await self.send("back_events", chat, self.callback(user, "back_events"))
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--users-per-flow", type=int, default=3)
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        async with engine.begin() as conn:
+            await seed(conn, size_from_args(args))
+
+    fake = FakeTelegram()
+    address = urlsplit(TELEGRAM_API_URL)
+    await fake.start(address.hostname, address.port)
+    test = BudgetTest(fake)
+    bot_app.dp.update.outer_middleware(test.timing_middleware)
+    await blocked_cache.refresh()
+    sa_event.listen(engine.sync_engine, "after_cursor_execute", _count)
+
+    try:
+        users, event_ids = await load_clients(args.users_per_flow)
+        if not event_ids:
+            raise SystemExit("No active events to check handlers against")
+        for user in users:
+            await test.browse(user, event_ids[0])
+            await test.sell(user, event_ids[0])
+            await test.manage(user, event_ids[0])
+    finally:
+        sa_event.remove(engine.sync_engine, "after_cursor_execute", _count)
+        await bot_app.on_shutdown()
+        await bot_app.bot.session.close()
+        await fake.stop()
+        await engine.dispose()
+
+    failures = []
+    for label, used in test.used.items():
+        budget = BUDGETS.get(label)
+        over = budget is None or used > budget
+        print(f"{label:<15} {used:>3} statements  budget {budget if budget is not None else '-':>3}  {'OVER' if over else 'ok'}")
+        if over:
+            failures.append(label)
+    errors = [step.label for step in test.steps if step.error]
+    if errors:
+        print(f"\nSteps that failed or timed out: {', '.join(sorted(set(errors)))}")
+    if failures:
+        print(f"\n{len(failures)} handlers over their query budget: {', '.join(failures)}")
+    return 1 if failures or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
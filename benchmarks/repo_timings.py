@@ -0,0 +1,122 @@
+"""Time every repository and dashboard stats function against the seeded database.
+
+Each function runs ``--repeat`` times (after one untimed warm-up), every run on a fresh
+session inside a savepoint that is rolled back, so writes don't pile up between runs and the
+whole benchmark leaves the data as seeded. Reports statements per call and latency
+percentiles; seed a production-sized database for numbers that mean something:
+
+    python -m benchmarks.repo_timings --users 200000 --events 1000 --registrations 2000000
+    python -m benchmarks.repo_timings --no-seed [--repeat 50] [--only get_all_users]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.explain_check import CHECKS, Check, pick_sample
+from benchmarks.seed import add_size_arguments, seed, size_from_args
+from src.db.models import OutboxMessage
+from src.db.session import engine
+from src.db import repositories as repo
+from src.scraper import ScrapedGame
+
+# Issued by the benchmark's own savepoints, not by the function being timed
+SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+# Claim token of the benchmark's pending outbox row, so the token-guarded writes match it
+OUTBOX_TOKEN = "bench"
+
+
+def timing_checks(outbox_id: int) -> list[Check]:
+    """The query-plan checks plus the functions they leave out, mostly writes and background jobs."""
+    game = ScrapedGame(name="Bench derby", date="2030-01-01", time="20:00", location="Teddy")
+    return [
+        *CHECKS,
+        Check("add_event", lambda s, x: repo.add_event(s, "Bench", "2030-01-01", "20:00", "Teddy")),
+        Check("sync_scraped_events", lambda s, x: repo.sync_scraped_events(s, [game])),
+        Check("renew_outbox_leases", lambda s, x: repo.renew_outbox_leases(s, [outbox_id], OUTBOX_TOKEN, 60)),
+        Check("checkpoint_outbox_message", lambda s, x: repo.checkpoint_outbox_message(s, outbox_id, OUTBOX_TOKEN, x.telegram_id, 1, 0, 0)),
+        Check("complete_outbox_message", lambda s, x: repo.complete_outbox_message(s, outbox_id, OUTBOX_TOKEN)),
+        Check("fail_outbox_message", lambda s, x: repo.fail_outbox_message(s, outbox_id, OUTBOX_TOKEN)),
+        Check("claim_update", lambda s, x: repo.claim_update(s, 2 ** 40)),
+        Check("release_update", lambda s, x: repo.release_update(s, 2 ** 40)),
+        Check("prune_processed_updates", lambda s, x: repo.prune_processed_updates(s, datetime.utcnow() - timedelta(days=1))),
+        Check("set_fsm_data", lambda s, x: repo.set_fsm_data(s, f"fsm:{x.telegram_id}:{x.telegram_id}", {"bench": 1}, 60)),
+        Check("refresh_activity_rollups", lambda s, x: repo.refresh_activity_rollups(s, datetime.utcnow(), 300)),
+    ]
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+async def run_timings(repeat: int, only: set[str]) -> None:
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        if not statement.startswith(SAVEPOINT_STATEMENTS):
+            statements += 1
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        sample = await pick_sample(conn)
+
+        # Kept until the final rollback: one pending outbox row for the outbox checks, and
+        # frozen rollups so refresh_activity_rollups is timed in steady state, not catching up
+        session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        message = OutboxMessage(kind="ticket_alert", event_id=sample.event_id, body="bench", locked_by=OUTBOX_TOKEN)
+        session.add(message)
+        await session.commit()
+        await repo.refresh_activity_rollups(session, datetime.utcnow(), 300)
+        await session.close()
+
+        sa_event.listen(engine.sync_engine, "after_cursor_execute", count)
+        print(f"{'function':<28}{'stmts':>6}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}  (ms)")
+        for check in timing_checks(message.id):
+            if only and check.name not in only:
+                continue
+            durations = []
+            for run in range(repeat + 1):
+                savepoint = await conn.begin_nested()
+                session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+                statements = 0
+                started = time.perf_counter()
+                await check.run(session, sample)
+                elapsed = time.perf_counter() - started
+                await session.close()
+                await savepoint.rollback()
+                if run:
+                    durations.append(elapsed * 1000)
+            print(f"{check.name:<28}{statements:>6}{statistics.fmean(durations):>9.2f}{percentile(durations, 50):>9.2f}"
+                  f"{percentile(durations, 95):>9.2f}{max(durations):>9.2f}")
+        sa_event.remove(engine.sync_engine, "after_cursor_execute", count)
+
+        await transaction.rollback()
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per function")
+    parser.add_argument("--only", action="append", default=[], help="time only this function (repeatable)")
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        async with engine.begin() as conn:
+            await seed(conn, size_from_args(args))
+
+    await run_timings(max(args.repeat, 1), set(args.only))
+    await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
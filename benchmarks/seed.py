@@ -0,0 +1,103 @@
+"""Fill the benchmark database with synthetic users, events, registrations and tickets.
+
+    python -m benchmarks.seed --users 200000 --events 1000 --registrations 2000000
+"""
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+import benchmarks  # noqa: F401  (points DATABASE_URL at BENCH_DATABASE_URL)
+from src.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+SEEDED_TABLES = ["outbox", "tickets", "registrations", "blocked_users", "events", "users"]
+SUMMARY_TABLES = ["dashboard_counters", "event_stats", "seller_stats"]
+
+
+@dataclass
+class SeedSize:
+    users: int = 20_000
+    events: int = 200
+    registrations: int = 200_000
+    tickets: int = 5_000
+    blocked: int = 200
+
+
+async def seed(conn: AsyncConnection, size: SeedSize):
+    """Truncate the app tables and insert ``size`` rows with generate_series.
+
+    Events are spread evenly around today (a tenth inactive); registrations and tickets are
+    skewed towards low event ids so a few events are very popular, like real derbies.
+    The dashboard summary tables are kept in step by their triggers, TRUNCATE included.
+    """
+    await conn.execute(text(f"TRUNCATE {', '.join(SEEDED_TABLES)} RESTART IDENTITY CASCADE"))
+    await conn.execute(text(f"""
+        INSERT INTO users (telegram_id, username, first_name, joined_at)
+        SELECT g, 'user' || g, 'User ' || g, now()::timestamp - random() * interval '365 days'
+        FROM generate_series(1, {size.users}) g
+    """))
+    await conn.execute(text(f"""
+        INSERT INTO events (name, date, time, location, starts_at, created_at, active)
+        SELECT 'Event ' || g, to_char(d, 'YYYY-MM-DD'), '20:00', 'Stadium ' || (g % 10),
+               d + interval '20 hours', now()::timestamp - interval '30 days', g % 10 <> 0
+        FROM generate_series(1, {size.events}) g,
+             LATERAL (SELECT current_date + (g - {size.events} / 2) AS d) x
+    """))
+    await conn.execute(text(f"""
+        INSERT INTO registrations (telegram_id, event_id, registered_at)
+        SELECT 1 + floor(random() * {size.users})::bigint,
+               1 + floor({size.events} * power(random(), 3))::int,
+               now()::timestamp - random() * interval '180 days'
+        FROM generate_series(1, {size.registrations})
+        ON CONFLICT DO NOTHING
+    """))
+    await conn.execute(text(f"""
+        INSERT INTO tickets (event_id, seller_telegram_id, description, posted_at, deleted_at)
+        SELECT 1 + floor({size.events} * power(random(), 3))::int,
+               1 + floor(random() * {size.users})::bigint,
+               'Section ' || g, posted_at,
+               CASE WHEN random() < 0.6 THEN posted_at + interval '1 day' END
+        FROM (
+            SELECT g, now()::timestamp - random() * interval '180 days' AS posted_at
+            FROM generate_series(1, {size.tickets}) g
+        ) t
+    """))
+    await conn.execute(text(f"""
+        INSERT INTO blocked_users (telegram_id, blocked_at, reason)
+        SELECT g, now()::timestamp - random() * interval '90 days', 'benchmark'
+        FROM generate_series(1, {size.users}, greatest({size.users} / greatest({size.blocked}, 1), 1)) g
+        LIMIT {size.blocked}
+    """))
+    for table in [*SEEDED_TABLES, *SUMMARY_TABLES]:
+        await conn.execute(text(f"ANALYZE {table}"))
+
+
+def add_size_arguments(parser: argparse.ArgumentParser):
+    defaults = SeedSize()
+    for field in ("users", "events", "registrations", "tickets", "blocked"):
+        parser.add_argument(f"--{field}", type=int, default=getattr(defaults, field))
+
+
+def size_from_args(args: argparse.Namespace) -> SeedSize:
+    return SeedSize(args.users, args.events, args.registrations, args.tickets, args.blocked)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_size_arguments(parser)
+    size = size_from_args(parser.parse_args())
+    async with engine.begin() as conn:
+        await seed(conn, size)
+    await engine.dispose()
+    logger.info("Seeded %s", size)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""Concurrent, rate-limited message fan-out to many Telegram chats."""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterable, Iterable
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from src.config import BROADCAST_CHAT_INTERVAL, BROADCAST_MAX_RETRIES, BROADCAST_RATE, BROADCAST_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BroadcastResult:
+    sent: int = 0
+    failed: int = 0
+    throttled: int = 0
+
+
+class TokenBucket:
+    """Token bucket shared by all senders; ``pause`` freezes it after a 429."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class Broadcaster:
+    """Send one text to many chats through a bounded worker pool.
+
+    A global token bucket keeps the bot under Telegram's overall send limit and a
+    per-chat interval keeps any single chat under its own limit, even when several
+    broadcasts run at the same time.
+    """
+
+    def __init__(
+        self,
+        workers: int = BROADCAST_WORKERS,
+        rate: float = BROADCAST_RATE,
+        chat_interval: float = BROADCAST_CHAT_INTERVAL,
+        max_retries: int = BROADCAST_MAX_RETRIES,
+    ):
+        self.workers = workers
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._bucket = TokenBucket(rate)
+        self._chat_next: dict[int, float] = {}
+
+    async def _wait_for_chat(self, chat_id: int):
+        now = time.monotonic()
+        next_allowed = self._chat_next.get(chat_id, 0.0)
+        self._chat_next[chat_id] = max(now, next_allowed) + self.chat_interval
+        if next_allowed > now:
+            await asyncio.sleep(next_allowed - now)
+
+    def _prune_chats(self):
+        now = time.monotonic()
+        self._chat_next = {c: t for c, t in self._chat_next.items() if t > now}
+
+    async def _send(self, bot: Bot, chat_id: int, text: str, result: BroadcastResult, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_chat(chat_id)
+            await self._bucket.acquire()
+            try:
+                await bot.send_message(chat_id, text, **kwargs)
+                result.sent += 1
+                return
+            except TelegramRetryAfter as e:
+                result.throttled += 1
+                self._bucket.pause(e.retry_after)
+                logger.warning("Rate limited sending to %s, retry after %ss (attempt %d)", chat_id, e.retry_after, attempt + 1)
+            except TelegramForbiddenError:
+                result.failed += 1
+                return
+            except Exception as e:
+                result.failed += 1
+                logger.warning("Failed to send message to %s: %s", chat_id, e)
+                return
+        result.failed += 1
+
+    async def broadcast(
+        self,
+        bot: Bot,
+        chat_ids: Iterable[int] | AsyncIterable[int],
+        text: str,
+        **kwargs,
+    ) -> BroadcastResult:
+        """Deliver ``text`` to every chat in ``chat_ids`` and return the delivery counts."""
+        result = BroadcastResult()
+        queue: asyncio.Queue[int | None] = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def worker():
+            while (chat_id := await queue.get()) is not None:
+                await self._send(bot, chat_id, text, result, **kwargs)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        try:
+            if isinstance(chat_ids, AsyncIterable):
+                async for chat_id in chat_ids:
+                    await queue.put(chat_id)
+            else:
+                for chat_id in chat_ids:
+                    await queue.put(chat_id)
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._prune_chats()
+        return result
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,68 @@
+"""Cache of rendered dashboard pages, invalidated by repository writes to the data behind them."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.config import DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL
+
+# Data a page can depend on; repository writes invalidate the matching tag
+USERS = "users"
+EVENTS = "events"
+REGISTRATIONS = "registrations"
+TICKETS = "tickets"
+BLOCKED = "blocked"
+
+
+@dataclass
+class CachedPage:
+    body: bytes
+    etag: str
+    versions: tuple[int, ...]
+    stored_at: float
+
+
+class PageCache:
+    """Rendered page bodies keyed by URL, each tagged with the data it was built from.
+
+    ``invalidate`` bumps a per-tag version; an entry is served only while the versions of its
+    tags are unchanged and it is younger than ``ttl``. Invalidation is in-process, so with several
+    worker processes a write made in another process shows up after at most ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL, max_entries: int = DASHBOARD_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._versions: dict[str, int] = {}
+        self._pages: OrderedDict[str, CachedPage] = OrderedDict()
+
+    def versions(self, tags: tuple[str, ...]) -> tuple[int, ...]:
+        """Current versions of ``tags``; take them before querying and pass them to ``set``."""
+        return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def get(self, key: str, tags: tuple[str, ...]) -> CachedPage | None:
+        page = self._pages.get(key)
+        if page is None:
+            return None
+        if page.versions != self.versions(tags) or time.monotonic() - page.stored_at > self.ttl:
+            del self._pages[key]
+            return None
+        self._pages.move_to_end(key)
+        return page
+
+    def set(self, key: str, body: bytes, versions: tuple[int, ...]) -> CachedPage:
+        page = CachedPage(body, f'"{hashlib.sha1(body).hexdigest()}"', versions, time.monotonic())
+        if self.ttl > 0:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+        return page
+
+    def invalidate(self, *tags: str):
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+page_cache = PageCache()
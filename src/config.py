@@ -10,3 +10,81 @@ WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
 ADMIN_IDS = [int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()]
 ADMIN_DASHBOARD_PASSWORD = os.getenv("ADMIN_DASHBOARD_PASSWORD", "")
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
+# Bot API base URL, e.g. a local Bot API server or benchmarks.fake_telegram; empty means api.telegram.org
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# Prometheus text metrics on /metrics; when METRICS_TOKEN is set, scrapers must send it as a bearer token
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Webhook serving processes; with more than one, set_webhook and event sync run only in the elected leader
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+LEADER_LOCK_ID = int(os.getenv("LEADER_LOCK_ID", "7246001"))
+LEADER_RETRY_INTERVAL = float(os.getenv("LEADER_RETRY_INTERVAL", "10"))
+# Opt-in uvloop event loop + httptools HTTP parser (pip install -r requirements-fast.txt); ignored if not installed
+FAST_RUNTIME = os.getenv("FAST_RUNTIME", "0") == "1"
+
+# Alert fan-out: Telegram allows ~30 messages/s per bot and ~1 message/s per chat
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "20"))
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "30"))
+BROADCAST_CHAT_INTERVAL = float(os.getenv("BROADCAST_CHAT_INTERVAL", "1.0"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+
+# Outbox dispatcher: ticket alerts are queued in Postgres and drained in the background
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "10"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2.0"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+OUTBOX_CHUNK_SIZE = int(os.getenv("OUTBOX_CHUNK_SIZE", "500"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+
+# Blocked-users cache: reload interval, and optional LISTEN/NOTIFY sync between replicas
+BLOCKED_CACHE_TTL = float(os.getenv("BLOCKED_CACHE_TTL", "60"))
+BLOCKED_CACHE_LISTEN = os.getenv("BLOCKED_CACHE_LISTEN", "1" if WEB_CONCURRENCY > 1 else "0") == "1"
+
+# User profile writes: unchanged profiles are skipped, changes are flushed in batches
+USER_FLUSH_INTERVAL = float(os.getenv("USER_FLUSH_INTERVAL", "0.5"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "100000"))
+
+# Database connection pool (asyncpg). Set both statement caches to 0 behind pgbouncer in transaction mode.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+
+# SQL timing per statement fingerprint: slow statements are logged, slow SELECTs optionally re-run under EXPLAIN ANALYZE
+QUERY_STATS_SIZE = int(os.getenv("QUERY_STATS_SIZE", "500"))
+QUERY_SLOW_MS = float(os.getenv("QUERY_SLOW_MS", "200"))
+QUERY_EXPLAIN_SLOW = os.getenv("QUERY_EXPLAIN_SLOW", "0") == "1"
+QUERY_EXPLAIN_INTERVAL = float(os.getenv("QUERY_EXPLAIN_INTERVAL", "600"))
+
+# Webhook ingestion: updates are acknowledged immediately and handled by a worker pool (0 = handle inline)
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_ENQUEUE_TIMEOUT = float(os.getenv("WEBHOOK_ENQUEUE_TIMEOUT", "5"))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "25"))
+
+# Webhook redelivery deduplication by update_id; DEDUP_SHARED=1 also checks a Postgres window shared by replicas
+DEDUP_WINDOW = int(os.getenv("DEDUP_WINDOW", "65536"))
+DEDUP_SHARED = os.getenv("DEDUP_SHARED", "1" if WEB_CONCURRENCY > 1 else "0") == "1"
+DEDUP_SHARED_TTL = int(os.getenv("DEDUP_SHARED_TTL", str(60 * 60 * 24)))
+
+# FSM storage: "postgres" shares conversations across processes and restarts, "memory" keeps them in-process
+FSM_STORAGE = os.getenv("FSM_STORAGE", "postgres")
+FSM_TTL = int(os.getenv("FSM_TTL", str(60 * 60 * 24)))
+# Cached reads are per process, so a state change made in another worker would go unseen for up to the TTL
+FSM_CACHE_TTL = float(os.getenv("FSM_CACHE_TTL", "0" if WEB_CONCURRENCY > 1 else "2"))
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+FSM_CLEANUP_INTERVAL = float(os.getenv("FSM_CLEANUP_INTERVAL", "300"))
+FSM_CLEANUP_BATCH = int(os.getenv("FSM_CLEANUP_BATCH", "1000"))
+
+# Dashboard page cache: rendered pages are reused until a related write or the TTL, whichever comes first
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "256"))
+# Independent queries of one dashboard page run concurrently, each on its own connection, with this timeout
+DASHBOARD_QUERY_TIMEOUT = float(os.getenv("DASHBOARD_QUERY_TIMEOUT", "10"))
+
+# Activity rollups: hourly/daily counts refreshed by the leader; buckets older than the grace period are frozen
+ROLLUP_INTERVAL = float(os.getenv("ROLLUP_INTERVAL", "60"))
+ROLLUP_GRACE = float(os.getenv("ROLLUP_GRACE", "300"))
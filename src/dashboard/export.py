@@ -0,0 +1,68 @@
+"""Full-table CSV / NDJSON exports streamed straight from a server-side cursor."""
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from sqlalchemy import select
+
+from src.db.models import User, Event, Registration, Ticket, EventStats
+from src.db.session import async_session
+
+BATCH_SIZE = 1000
+
+EXPORTS = {
+    "users": select(User.telegram_id, User.username, User.first_name, User.joined_at).order_by(User.telegram_id),
+    "events": (
+        select(
+            Event.id, Event.name, Event.date, Event.time, Event.location, Event.starts_at,
+            Event.active, Event.created_at, EventStats.reg_count, EventStats.ticket_count,
+        )
+        .join(EventStats, EventStats.event_id == Event.id)
+        .order_by(Event.id)
+    ),
+    "tickets": select(
+        Ticket.id, Ticket.event_id, Ticket.seller_telegram_id, Ticket.description, Ticket.posted_at, Ticket.deleted_at,
+    ).order_by(Ticket.id),
+    "registrations": select(
+        Registration.id, Registration.telegram_id, Registration.event_id, Registration.registered_at,
+    ).order_by(Registration.id),
+}
+
+# format -> (media type, file extension)
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_chunk(rows: list[tuple]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_export(table: str, fmt: str, batch_size: int = BATCH_SIZE) -> AsyncIterator[str]:
+    """Yield ``table`` as ``fmt`` text, one chunk per ``batch_size`` rows, holding at most one batch in memory."""
+    stmt = EXPORTS[table]
+    columns = list(stmt.selected_columns.keys())
+    if fmt == "csv":
+        yield _csv_chunk([columns])
+
+    async with async_session() as session:
+        result = await session.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            if fmt == "csv":
+                yield _csv_chunk(rows)
+            else:
+                yield "".join(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows)
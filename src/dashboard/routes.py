@@ -1,19 +1,30 @@
+import asyncio
+import functools
+import logging
 import pathlib
+from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, HTTPException, Request, Form, Query
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
-from src.db.session import async_session
+from src.config import DASHBOARD_QUERY_TIMEOUT
+from src.db.session import async_session, pool_status
+from src.db.query_stats import query_stats
+from src.ingest import update_queue
 from src.db.repositories import block_user, unblock_user
 from src.dashboard.auth import require_auth, check_password, create_session_cookie, COOKIE_NAME
 from src.dashboard import stats
+from src.dashboard.export import EXPORTS, FORMATS, stream_export
+from src.cache import page_cache, USERS, EVENTS, REGISTRATIONS, TICKETS, BLOCKED
 
 TEMPLATES_DIR = pathlib.Path(__file__).parent / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 router = APIRouter(prefix="/dashboard")
 
+logger = logging.getLogger(__name__)
+
 
 # --- Auth ---
 
@@ -39,63 +50,102 @@ async def logout(request: Request):
 
 # --- Dashboard pages ---
 
+async def run_queries(*queries, timeout: float = DASHBOARD_QUERY_TIMEOUT) -> list:
+    """Run independent ``query(session)`` callables concurrently, each on its own pooled session.
+
+    The page costs the slowest query instead of the sum. A query that takes longer than
+    ``timeout`` seconds is cancelled and the page fails with 504.
+    """
+    async def run(query):
+        async with async_session() as session:
+            try:
+                return await asyncio.wait_for(query(session), timeout)
+            except asyncio.TimeoutError:
+                name = getattr(getattr(query, "func", query), "__name__", repr(query))
+                logger.warning("Dashboard query %s timed out after %.1fs", name, timeout)
+                raise HTTPException(status_code=504, detail="Dashboard query timed out")
+
+    return await asyncio.gather(*(run(query) for query in queries))
+
+
+def cached_page(*tags: str):
+    """Serve the page from ``page_cache`` until a write touches one of ``tags``, with ETag revalidation.
+
+    Authentication is checked before the cache, so cached pages are only ever served to admins.
+    """
+    def decorator(route):
+        @functools.wraps(route)
+        async def wrapper(request: Request, **kwargs):
+            redirect = require_auth(request)
+            if redirect:
+                return redirect
+            key = f"{request.url.path}?{request.url.query}"
+            page = page_cache.get(key, tags)
+            if page is None:
+                versions = page_cache.versions(tags)
+                response = await route(request, **kwargs)
+                if response.status_code != 200:
+                    return response
+                page = page_cache.set(key, response.body, versions)
+            # no-cache: the browser must revalidate, and an unchanged page costs a body-less 304
+            headers = {"ETag": page.etag, "Cache-Control": "private, no-cache"}
+            if request.headers.get("if-none-match") == page.etag:
+                return Response(status_code=304, headers=headers)
+            return HTMLResponse(page.body, headers=headers)
+        return wrapper
+    return decorator
+
+
 @router.get("", response_class=HTMLResponse)
+@cached_page(USERS, EVENTS, REGISTRATIONS, TICKETS, BLOCKED)
 async def index(request: Request):
-    redirect = require_auth(request)
-    if redirect:
-        return redirect
-    async with async_session() as session:
-        overview = await stats.get_overview_stats(session)
-        top_events = await stats.get_top_events(session)
+    overview, top_events = await run_queries(stats.get_overview_stats, stats.get_top_events)
     return templates.TemplateResponse("index.html", {
         "request": request, "stats": overview, "top_events": top_events, "page": "index",
     })
 
 
+def _listing(q: str, sort: str, order: str, cursor: str) -> dict:
+    """Keyword arguments for the paginated ``stats.get_all_*`` functions from the page's query string."""
+    return {"search": q.strip() or None, "sort": sort or None, "descending": order != "asc", "cursor": cursor or None}
+
+
 @router.get("/users", response_class=HTMLResponse)
-async def users_page(request: Request):
-    redirect = require_auth(request)
-    if redirect:
-        return redirect
-    async with async_session() as session:
-        users = await stats.get_all_users(session)
-        growth = await stats.get_user_growth(session)
+@cached_page(USERS, REGISTRATIONS)
+async def users_page(request: Request, q: str = "", sort: str = "", order: str = "desc", cursor: str = ""):
+    users, growth = await run_queries(
+        functools.partial(stats.get_all_users, **_listing(q, sort, order, cursor)), stats.get_user_growth,
+    )
     return templates.TemplateResponse("pages.html", {
-        "request": request, "section": "users", "users": users, "growth": growth, "page": "users",
+        "request": request, "section": "users", "users": users, "growth": growth, "q": q, "page": "users",
     })
 
 
 @router.get("/events", response_class=HTMLResponse)
-async def events_page(request: Request):
-    redirect = require_auth(request)
-    if redirect:
-        return redirect
+@cached_page(EVENTS, REGISTRATIONS, TICKETS)
+async def events_page(request: Request, q: str = "", sort: str = "", order: str = "desc", cursor: str = ""):
     async with async_session() as session:
-        events = await stats.get_all_events(session)
+        events = await stats.get_all_events(session, **_listing(q, sort, order, cursor))
     return templates.TemplateResponse("pages.html", {
-        "request": request, "section": "events", "events": events, "page": "events",
+        "request": request, "section": "events", "events": events, "q": q, "page": "events",
     })
 
 
 @router.get("/tickets", response_class=HTMLResponse)
-async def tickets_page(request: Request):
-    redirect = require_auth(request)
-    if redirect:
-        return redirect
-    async with async_session() as session:
-        tickets = await stats.get_all_tickets(session)
-        top_sellers = await stats.get_top_sellers(session)
+@cached_page(TICKETS, EVENTS, USERS)
+async def tickets_page(request: Request, q: str = "", sort: str = "", order: str = "desc", cursor: str = ""):
+    tickets, top_sellers = await run_queries(
+        functools.partial(stats.get_all_tickets, **_listing(q, sort, order, cursor)), stats.get_top_sellers,
+    )
     return templates.TemplateResponse("pages.html", {
         "request": request, "section": "tickets", "tickets": tickets,
-        "top_sellers": top_sellers, "page": "tickets",
+        "top_sellers": top_sellers, "q": q, "page": "tickets",
     })
 
 
 @router.get("/blocked", response_class=HTMLResponse)
+@cached_page(BLOCKED)
 async def blocked_page(request: Request):
-    redirect = require_auth(request)
-    if redirect:
-        return redirect
     async with async_session() as session:
         blocked = await stats.get_blocked_users(session)
     return templates.TemplateResponse("pages.html", {
@@ -103,6 +153,23 @@ async def blocked_page(request: Request):
     })
 
 
+# --- Exports ---
+
+@router.get("/export/{table}")
+async def export_table(request: Request, table: str, fmt: str = Query("csv", alias="format")):
+    redirect = require_auth(request)
+    if redirect:
+        return redirect
+    if table not in EXPORTS or fmt not in FORMATS:
+        return Response(status_code=404)
+    media_type, extension = FORMATS[fmt]
+    filename = f"tickalert-{table}-{date.today().isoformat()}.{extension}"
+    return StreamingResponse(
+        stream_export(table, fmt), media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # --- Block/Unblock actions ---
 
 @router.post("/block", response_class=HTMLResponse)
@@ -123,3 +190,65 @@ async def unblock_action(request: Request, telegram_id: int = Form(...)):
     async with async_session() as session:
         await unblock_user(session, telegram_id)
     return RedirectResponse("/dashboard/blocked", status_code=302)
+
+
+# --- Diagnostics ---
+
+@router.get("/api/pool")
+async def pool_api(request: Request):
+    redirect = require_auth(request)
+    if redirect:
+        return redirect
+    return JSONResponse(pool_status())
+
+
+@router.get("/api/ingest")
+async def ingest_api(request: Request):
+    redirect = require_auth(request)
+    if redirect:
+        return redirect
+    return JSONResponse(update_queue.status())
+
+
+# query_stats.top sort keys, heaviest first
+QUERY_SORTS = {"total": "Total", "mean": "Mean", "max": "Max", "calls": "Calls", "slow_calls": "Slow"}
+
+
+@router.get("/queries", response_class=HTMLResponse)
+async def queries_page(request: Request, sort: str = "total"):
+    redirect = require_auth(request)
+    if redirect:
+        return redirect
+    if sort not in QUERY_SORTS:
+        sort = "total"
+    return templates.TemplateResponse("pages.html", {
+        "request": request, "section": "queries", "queries": query_stats.top(sort), "query_sorts": QUERY_SORTS,
+        "sort": sort, "since": datetime.fromtimestamp(query_stats.since), "slow_ms": query_stats.slow_ms,
+        "page": "queries",
+    })
+
+
+@router.post("/queries/reset")
+async def queries_reset(request: Request):
+    redirect = require_auth(request)
+    if redirect:
+        return redirect
+    query_stats.reset()
+    return RedirectResponse("/dashboard/queries", status_code=302)
+
+
+# granularity -> longest range the API serves, so a chart is at most a few hundred buckets
+ACTIVITY_RANGES = {"hour": timedelta(days=14), "day": timedelta(days=3 * 365)}
+
+
+@router.get("/api/activity")
+async def activity_api(request: Request, granularity: str = "day", days: int = 90, metric: list[str] = Query(None)):
+    redirect = require_auth(request)
+    if redirect:
+        return redirect
+    if granularity not in ACTIVITY_RANGES:
+        return JSONResponse({"error": f"granularity must be one of {', '.join(ACTIVITY_RANGES)}"}, status_code=400)
+    since = datetime.utcnow() - min(timedelta(days=max(days, 1)), ACTIVITY_RANGES[granularity])
+    async with async_session() as session:
+        buckets = await stats.get_activity(session, granularity, since, metric)
+    return JSONResponse({"granularity": granularity, "since": since.isoformat(), "buckets": buckets})
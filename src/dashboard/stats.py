@@ -1,31 +1,108 @@
-from sqlalchemy import select, func
+import base64
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select, func, or_, literal, tuple_, union
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Select
 
-from src.db.models import User, BlockedUser, Event, Registration, Ticket
+from src.db.models import (
+    User, BlockedUser, Event, Registration, Ticket, DashboardCounter, EventStats, SellerStats, ActivityRollup,
+    EVENT_START_SORT_KEY, USER_NAME_SORT_KEY,
+)
+from src.db.repositories import ROLLUP_METRICS
 
+PAGE_SIZE = 50
+
+
+@dataclass
+class Page:
+    """One page of a dashboard listing; pass ``next_cursor`` back to get the page after it."""
+    rows: list[dict]
+    next_cursor: str | None
+    sort: str
+    descending: bool
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """A sortable listing column; ``parse`` turns the JSON value stored in a cursor back into a column value."""
+    expr: ColumnElement
+    parse: Callable[[Any], Any] = lambda value: value
+
+
+def _encode_cursor(tag: str, value, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([tag, value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str | None, tag: str, key: SortKey) -> tuple | None:
+    """Return the (sort value, id) a cursor points after; None for no, malformed or other-sort cursors."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_tag, value, row_id = json.loads(raw)
+        if cursor_tag != tag:
+            return None
+        return key.parse(value), int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _contains(column: ColumnElement, text: str) -> ColumnElement:
+    """Case-insensitive substring match that the column's pg_trgm index can serve."""
+    escaped = text.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return column.ilike(f"%{escaped}%", escape="/")
+
+
+def _search_id(text: str) -> int | None:
+    text = text.strip().lstrip("@")
+    return int(text) if text.isdigit() else None
 
-async def get_overview_stats(session: AsyncSession) -> dict:
-    """Return key metrics for the main dashboard."""
-    total_users = (await session.execute(select(func.count()).select_from(User))).scalar() or 0
-    active_events = (await session.execute(
-        select(func.count()).select_from(Event).where(Event.active == True)
-    )).scalar() or 0
-    total_registrations = (await session.execute(
-        select(func.count()).select_from(Registration)
-    )).scalar() or 0
-    total_tickets = (await session.execute(
-        select(func.count()).select_from(Ticket)
-    )).scalar() or 0
-    blocked_users = (await session.execute(
-        select(func.count()).select_from(BlockedUser)
-    )).scalar() or 0
 
+async def _fetch_page(
+    session: AsyncSession, stmt: Select, sorts: dict[str, SortKey], id_column: ColumnElement,
+    sort: str | None, descending: bool, cursor: str | None, limit: int, to_dict: Callable[[Any], dict],
+) -> Page:
+    """Run ``stmt`` ordered by (sort column, id) and starting after ``cursor``; one bounded query per page."""
+    if sort not in sorts:
+        sort = next(iter(sorts))
+    key = sorts[sort]
+    tag = f"{sort}:{'desc' if descending else 'asc'}"
+
+    position = _decode_cursor(cursor, tag, key)
+    if position is not None:
+        current = tuple_(key.expr, id_column)
+        after = tuple_(literal(position[0], key.expr.type), literal(position[1], id_column.type))
+        stmt = stmt.where(current < after if descending else current > after)
+    order = (key.expr.desc(), id_column.desc()) if descending else (key.expr, id_column)
+    stmt = stmt.add_columns(key.expr.label("sort_value")).order_by(*order).limit(limit + 1)
+
+    rows = (await session.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(tag, last.sort_value, getattr(last, id_column.key))
+    return Page([to_dict(r) for r in rows], next_cursor, sort, descending)
+
+
+async def get_overview_stats(session: AsyncSession) -> dict:
+    """Return key metrics for the main dashboard, read from the trigger-maintained counters."""
+    result = await session.execute(select(DashboardCounter.name, DashboardCounter.value))
+    counters = dict(result.all())
     return {
-        "total_users": total_users,
-        "active_events": active_events,
-        "total_registrations": total_registrations,
-        "total_tickets": total_tickets,
-        "blocked_users": blocked_users,
+        "total_users": counters.get("users", 0),
+        "active_events": counters.get("active_events", 0),
+        "total_registrations": counters.get("registrations", 0),
+        "total_tickets": counters.get("tickets", 0),
+        "blocked_users": counters.get("blocked_users", 0),
     }
 
 
@@ -34,11 +111,10 @@ async def get_top_events(session: AsyncSession, limit: int = 10) -> list[dict]:
     result = await session.execute(
         select(
             Event.id, Event.name, Event.date, Event.active,
-            func.count(Registration.id).label("reg_count"),
+            EventStats.reg_count,
         )
-        .outerjoin(Registration, Registration.event_id == Event.id)
-        .group_by(Event.id)
-        .order_by(func.count(Registration.id).desc())
+        .join(EventStats, EventStats.event_id == Event.id)
+        .order_by(EventStats.reg_count.desc())
         .limit(limit)
     )
     return [
@@ -47,69 +123,124 @@ async def get_top_events(session: AsyncSession, limit: int = 10) -> list[dict]:
     ]
 
 
-async def get_all_users(session: AsyncSession) -> list[dict]:
-    """Return all users with their registration counts."""
-    result = await session.execute(
-        select(
-            User.telegram_id, User.username, User.first_name, User.joined_at,
-            func.count(Registration.id).label("reg_count"),
-        )
-        .outerjoin(Registration, Registration.telegram_id == User.telegram_id)
-        .group_by(User.telegram_id)
-        .order_by(User.joined_at.desc())
+USER_SORTS = {
+    "joined": SortKey(User.joined_at, datetime.fromisoformat),
+    "username": SortKey(USER_NAME_SORT_KEY),
+    "id": SortKey(User.telegram_id, int),
+}
+
+
+async def get_all_users(
+    session: AsyncSession, search: str | None = None, sort: str | None = None, descending: bool = True,
+    cursor: str | None = None, limit: int = PAGE_SIZE,
+) -> Page:
+    """Return a page of users with their registration counts, optionally filtered by username or telegram id."""
+    reg_count = (
+        select(func.count())
+        .where(Registration.telegram_id == User.telegram_id)
+        .scalar_subquery()
     )
-    return [
-        {
+    stmt = select(User.telegram_id, User.username, User.first_name, User.joined_at, reg_count.label("reg_count"))
+    if search:
+        condition = _contains(User.username, search.strip().lstrip("@"))
+        if (telegram_id := _search_id(search)) is not None:
+            condition = or_(condition, User.telegram_id == telegram_id)
+        stmt = stmt.where(condition)
+    return await _fetch_page(
+        session, stmt, USER_SORTS, User.telegram_id, sort, descending, cursor, limit,
+        lambda r: {
             "telegram_id": r.telegram_id,
             "username": r.username,
             "first_name": r.first_name,
             "joined_at": r.joined_at,
             "reg_count": r.reg_count,
-        }
-        for r in result.all()
-    ]
+        },
+    )
 
 
 async def get_user_growth(session: AsyncSession) -> list[dict]:
-    """Return daily user signup counts."""
+    """Return daily user signup counts from the daily rollup (one row per day, not per user)."""
     result = await session.execute(
-        select(
-            func.date_trunc("day", User.joined_at).label("day"),
-            func.count().label("count"),
-        )
-        .group_by("day")
-        .order_by("day")
+        select(ActivityRollup.bucket, ActivityRollup.value)
+        .where(ActivityRollup.granularity == "day", ActivityRollup.metric == "signups")
+        .order_by(ActivityRollup.bucket)
     )
-    return [{"day": str(r.day.date()) if r.day else "N/A", "count": r.count} for r in result.all()]
+    return [{"day": str(r.bucket.date()), "count": r.value} for r in result.all()]
 
 
-async def get_all_events(session: AsyncSession) -> list[dict]:
-    """Return all events with registration and ticket counts."""
+async def get_activity(
+    session: AsyncSession, granularity: str, since: datetime, metrics: list[str] | None = None,
+) -> list[dict]:
+    """Return rollup buckets from ``since`` on, one dict per bucket with a count per metric (0 if none)."""
+    metrics = metrics or list(ROLLUP_METRICS)
     result = await session.execute(
+        select(ActivityRollup.bucket, ActivityRollup.metric, ActivityRollup.value)
+        .where(
+            ActivityRollup.granularity == granularity,
+            ActivityRollup.metric.in_(metrics),
+            ActivityRollup.bucket >= since,
+        )
+        .order_by(ActivityRollup.bucket)
+    )
+    buckets: dict[datetime, dict] = {}
+    for r in result.all():
+        row = buckets.setdefault(r.bucket, {"bucket": r.bucket.isoformat(), **dict.fromkeys(metrics, 0)})
+        row[r.metric] = r.value
+    return list(buckets.values())
+
+
+EVENT_SORTS = {
+    "starts": SortKey(EVENT_START_SORT_KEY, datetime.fromisoformat),
+    "name": SortKey(Event.name),
+}
+
+
+async def get_all_events(
+    session: AsyncSession, search: str | None = None, sort: str | None = None, descending: bool = True,
+    cursor: str | None = None, limit: int = PAGE_SIZE,
+) -> Page:
+    """Return a page of events with registration and ticket counts, optionally filtered by name.
+
+    Counts come from the trigger-maintained ``event_stats`` row, one per event, rather than joining
+    registrations and tickets, which multiplies into registrations x tickets rows per event.
+    """
+    stmt = (
         select(
             Event.id, Event.name, Event.date, Event.time, Event.location,
             Event.active, Event.created_at,
-            func.count(func.distinct(Registration.id)).label("reg_count"),
-            func.count(func.distinct(Ticket.id)).label("ticket_count"),
+            EventStats.reg_count, EventStats.ticket_count,
         )
-        .outerjoin(Registration, Registration.event_id == Event.id)
-        .outerjoin(Ticket, Ticket.event_id == Event.id)
-        .group_by(Event.id)
-        .order_by(Event.date.desc())
+        .join(EventStats, EventStats.event_id == Event.id)
     )
-    return [
-        {
+    if search:
+        stmt = stmt.where(_contains(Event.name, search.strip()))
+    return await _fetch_page(
+        session, stmt, EVENT_SORTS, Event.id, sort, descending, cursor, limit,
+        lambda r: {
             "id": r.id, "name": r.name, "date": r.date, "time": r.time,
             "location": r.location, "active": r.active, "created_at": r.created_at,
             "reg_count": r.reg_count, "ticket_count": r.ticket_count,
-        }
-        for r in result.all()
-    ]
+        },
+    )
 
 
-async def get_all_tickets(session: AsyncSession) -> list[dict]:
-    """Return all tickets with event name and seller info."""
-    result = await session.execute(
+TICKET_SORTS = {
+    "posted": SortKey(Ticket.posted_at, datetime.fromisoformat),
+    "id": SortKey(Ticket.id, int),
+}
+
+
+async def get_all_tickets(
+    session: AsyncSession, search: str | None = None, sort: str | None = None, descending: bool = True,
+    cursor: str | None = None, limit: int = PAGE_SIZE,
+) -> Page:
+    """Return a page of tickets with event name and seller info, optionally filtered by event or seller.
+
+    The search is a UNION of ticket ids reached through indexes (events and sellers matched by
+    their trigram indexes, then tickets by event and by seller, plus an exact seller id), since an
+    OR across the joined tables can only be answered by reading every ticket.
+    """
+    stmt = (
         select(
             Ticket.id, Ticket.description, Ticket.posted_at,
             Ticket.seller_telegram_id, Ticket.deleted_at,
@@ -119,31 +250,39 @@ async def get_all_tickets(session: AsyncSession) -> list[dict]:
         )
         .join(Event, Ticket.event_id == Event.id)
         .join(User, Ticket.seller_telegram_id == User.telegram_id)
-        .order_by(Ticket.posted_at.desc())
     )
-    return [
-        {
+    if search:
+        matches = [
+            select(Ticket.id).where(Ticket.event_id.in_(select(Event.id).where(_contains(Event.name, search.strip())))),
+            select(Ticket.id).where(Ticket.seller_telegram_id.in_(
+                select(User.telegram_id).where(_contains(User.username, search.strip().lstrip("@")))
+            )),
+        ]
+        if (telegram_id := _search_id(search)) is not None:
+            matches.append(select(Ticket.id).where(Ticket.seller_telegram_id == telegram_id))
+        stmt = stmt.where(Ticket.id.in_(union(*matches)))
+    return await _fetch_page(
+        session, stmt, TICKET_SORTS, Ticket.id, sort, descending, cursor, limit,
+        lambda r: {
             "id": r.id, "description": r.description, "posted_at": r.posted_at,
             "seller_telegram_id": r.seller_telegram_id,
             "deleted_at": r.deleted_at,
             "event_name": r.event_name,
             "seller_username": r.seller_username,
             "seller_first_name": r.seller_first_name,
-        }
-        for r in result.all()
-    ]
+        },
+    )
 
 
 async def get_top_sellers(session: AsyncSession, limit: int = 10) -> list[dict]:
-    """Return top ticket sellers."""
+    """Return top ticket sellers, read from the trigger-maintained ``seller_stats`` tallies."""
     result = await session.execute(
         select(
             User.telegram_id, User.username, User.first_name,
-            func.count(Ticket.id).label("ticket_count"),
+            SellerStats.ticket_count,
         )
-        .join(Ticket, Ticket.seller_telegram_id == User.telegram_id)
-        .group_by(User.telegram_id)
-        .order_by(func.count(Ticket.id).desc())
+        .join(SellerStats, SellerStats.seller_telegram_id == User.telegram_id)
+        .order_by(SellerStats.ticket_count.desc())
         .limit(limit)
     )
     return [
@@ -0,0 +1,107 @@
+"""In-process cache of blocked telegram ids."""
+
+import asyncio
+import logging
+import time
+
+import asyncpg
+from sqlalchemy import select
+
+from src.config import BLOCKED_CACHE_TTL, DATABASE_URL
+from src.db.models import BlockedUser
+from src.db.session import async_session
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "blocked_users"
+
+
+class BlockedCache:
+    """Set of blocked telegram ids, reloaded from Postgres every ``ttl`` seconds.
+
+    ``block_user``/``unblock_user`` update the local set right after committing and publish a
+    NOTIFY on ``NOTIFY_CHANNEL``; other replicas pick it up through ``start_listener`` or, without
+    a listener, on their next TTL reload.
+    """
+
+    def __init__(self, ttl: float = BLOCKED_CACHE_TTL):
+        self.ttl = ttl
+        self._ids: set[int] = set()
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._listener: asyncio.Task | None = None
+        self._changes = 0
+
+    async def refresh(self):
+        changes = self._changes
+        async with async_session() as session:
+            result = await session.execute(select(BlockedUser.telegram_id))
+            self._ids = set(result.scalars().all())
+        # A block/unblock that landed mid-load may be missing from the snapshot; reload next time
+        self._loaded_at = time.monotonic() if self._changes == changes else None
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def is_blocked(self, telegram_id: int) -> bool:
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    await self.refresh()
+        return telegram_id in self._ids
+
+    def add(self, telegram_id: int):
+        self._ids.add(telegram_id)
+        self._changes += 1
+
+    def discard(self, telegram_id: int):
+        self._ids.discard(telegram_id)
+        self._changes += 1
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        action, _, telegram_id = payload.partition(":")
+        try:
+            telegram_id = int(telegram_id)
+        except ValueError:
+            logger.warning("Ignoring malformed %s notification: %r", NOTIFY_CHANNEL, payload)
+            return
+        if action == "block":
+            self.add(telegram_id)
+        elif action == "unblock":
+            self.discard(telegram_id)
+
+    async def _listen(self):
+        dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                # Notifications sent while we were disconnected are lost, so resync
+                await self.refresh()
+                while not connection.is_closed():
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Blocked-users listener failed, reconnecting")
+                await asyncio.sleep(5)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+    def start_listener(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+blocked_cache = BlockedCache()
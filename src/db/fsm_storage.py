@@ -0,0 +1,141 @@
+"""aiogram FSM storage backed by Postgres, so conversations survive restarts and span processes."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from src.config import FSM_CACHE_SIZE, FSM_CACHE_TTL, FSM_CLEANUP_BATCH, FSM_CLEANUP_INTERVAL, FSM_TTL
+from src.db.session import async_session
+from src.db import repositories as repo
+
+logger = logging.getLogger(__name__)
+
+Record = tuple[str | None, dict[str, Any]]
+
+
+class PostgresStorage(BaseStorage):
+    """FSM state and data kept in the ``fsm_states`` table, one row per key.
+
+    Every write is a single UPSERT that also pushes ``expires_at`` ``ttl`` seconds ahead, so
+    abandoned conversations expire and are deleted in batches by a background task. Writes go
+    through to the database and to a small in-process cache; reads are served from the cache for
+    ``cache_ttl`` seconds, which covers the several reads a single update makes. Keep ``cache_ttl``
+    short when running several processes, since another process may take the next update of the
+    same chat.
+    """
+
+    def __init__(
+        self,
+        ttl: float = FSM_TTL,
+        cache_ttl: float = FSM_CACHE_TTL,
+        cache_size: int = FSM_CACHE_SIZE,
+        cleanup_interval: float = FSM_CLEANUP_INTERVAL,
+        cleanup_batch: int = FSM_CLEANUP_BATCH,
+        key_builder: KeyBuilder | None = None,
+    ):
+        self.ttl = ttl
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.cleanup_interval = cleanup_interval
+        self.cleanup_batch = cleanup_batch
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self._cache: OrderedDict[str, tuple[float, Record]] = OrderedDict()
+        self._cleaner: asyncio.Task | None = None
+
+    def _cached(self, key: str) -> Record | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        cached_at, record = entry
+        if time.monotonic() - cached_at > self.cache_ttl:
+            del self._cache[key]
+            return None
+        return record
+
+    def _remember(self, key: str, record: Record):
+        if self.cache_ttl <= 0:
+            return
+        self._cache[key] = (time.monotonic(), record)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _load(self, key: str) -> Record:
+        record = self._cached(key)
+        if record is None:
+            async with async_session() as session:
+                row = await repo.get_fsm_record(session, key)
+            record = (row.state, row.data) if row is not None else (None, {})
+            self._remember(key, record)
+        return record
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        storage_key = self.key_builder.build(key)
+        async with async_session() as session:
+            await repo.set_fsm_state(session, storage_key, state, self.ttl)
+        cached = self._cached(storage_key)
+        if cached is not None:
+            self._remember(storage_key, (state, cached[1]))
+        else:
+            self._cache.pop(storage_key, None)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _ = await self._load(self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        storage_key = self.key_builder.build(key)
+        async with async_session() as session:
+            await repo.set_fsm_data(session, storage_key, data, self.ttl)
+        cached = self._cached(storage_key)
+        if cached is not None:
+            self._remember(storage_key, (cached[0], data.copy()))
+        else:
+            self._cache.pop(storage_key, None)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data = await self._load(self.key_builder.build(key))
+        return data.copy()
+
+    async def _cleanup(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                deleted = 0
+                while True:
+                    async with async_session() as session:
+                        batch = await repo.prune_fsm_records(session, self.cleanup_batch)
+                    deleted += batch
+                    if batch < self.cleanup_batch:
+                        break
+                if deleted:
+                    logger.info("Deleted %d expired FSM records", deleted)
+            except Exception:
+                logger.exception("Failed to delete expired FSM records")
+
+    def start(self):
+        if self._cleaner is None:
+            self._cleaner = asyncio.create_task(self._cleanup())
+
+    async def close(self) -> None:
+        if self._cleaner is not None:
+            self._cleaner.cancel()
+            try:
+                await self._cleaner
+            except asyncio.CancelledError:
+                pass
+            self._cleaner = None
+        self._cache.clear()
+
+
+fsm_storage = PostgresStorage()
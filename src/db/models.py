@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, String, Text, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import BigInteger, String, Text, Boolean, Integer, ForeignKey, UniqueConstraint, Index, func, literal_column, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -15,6 +16,16 @@ class User(Base):
     first_name: Mapped[str | None] = mapped_column(String(255))
     joined_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_users_joined_at_id", "joined_at", "telegram_id"),
+        Index("ix_users_username_trgm", "username", postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"}),
+    )
+
+
+# Dashboard sort key for usernames; a literal '' (not a bind param) so queries match the expression index
+USER_NAME_SORT_KEY = func.coalesce(User.username, literal_column("''"))
+Index("ix_users_username_id", USER_NAME_SORT_KEY, User.telegram_id)
+
 
 class BlockedUser(Base):
     __tablename__ = "blocked_users"
@@ -23,6 +34,8 @@ class BlockedUser(Base):
     blocked_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     reason: Mapped[str | None] = mapped_column(Text)
 
+    __table_args__ = (Index("ix_blocked_users_blocked_at", "blocked_at"),)
+
 
 class Event(Base):
     __tablename__ = "events"
@@ -32,10 +45,19 @@ class Event(Base):
     date: Mapped[str] = mapped_column(String(50))
     time: Mapped[str | None] = mapped_column(String(10))
     location: Mapped[str | None] = mapped_column(String(500))
+    starts_at: Mapped[datetime | None] = mapped_column(default=None)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     active: Mapped[bool] = mapped_column(Boolean, default=True)
 
 
+# Events whose date couldn't be parsed (starts_at NULL) sort last and are never treated as past
+EVENT_START_SORT_KEY = func.coalesce(Event.starts_at, literal_column("'infinity'::timestamp"))
+Index("ix_events_upcoming", EVENT_START_SORT_KEY, postgresql_where=Event.active)
+Index("ix_events_start_id", EVENT_START_SORT_KEY, Event.id)
+Index("ix_events_name_id", Event.name, Event.id)
+Index("ix_events_name_trgm", Event.name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+
+
 class Registration(Base):
     __tablename__ = "registrations"
 
@@ -44,7 +66,11 @@ class Registration(Base):
     event_id: Mapped[int] = mapped_column(ForeignKey("events.id"))
     registered_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
-    __table_args__ = (UniqueConstraint("telegram_id", "event_id"),)
+    __table_args__ = (
+        UniqueConstraint("telegram_id", "event_id"),
+        Index("ix_registrations_event_telegram", "event_id", "telegram_id"),
+        Index("ix_registrations_registered_at", "registered_at"),
+    )
 
 
 class Ticket(Base):
@@ -56,3 +82,112 @@ class Ticket(Base):
     description: Mapped[str | None] = mapped_column(Text)
     posted_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     deleted_at: Mapped[datetime | None] = mapped_column(default=None)
+
+    __table_args__ = (
+        Index("ix_tickets_event_id", "event_id"),
+        Index("ix_tickets_seller_telegram_id", "seller_telegram_id"),
+        Index("ix_tickets_posted_at_id", "posted_at", "id"),
+        Index("ix_tickets_event_active", "event_id", "posted_at", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_tickets_seller_active", "seller_telegram_id", "posted_at", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_tickets_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
+
+
+class DashboardCounter(Base):
+    """Running row count shown on the dashboard overview, kept current by triggers on the counted table."""
+    __tablename__ = "dashboard_counters"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class EventStats(Base):
+    """Per-event registration and ticket tallies, kept current by triggers on registrations and tickets."""
+    __tablename__ = "event_stats"
+
+    event_id: Mapped[int] = mapped_column(ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    reg_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    ticket_count: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    __table_args__ = (Index("ix_event_stats_reg_count", "reg_count"),)
+
+
+class SellerStats(Base):
+    """Per-seller ticket tally, kept current by triggers on tickets."""
+    __tablename__ = "seller_stats"
+
+    seller_telegram_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("users.telegram_id", ondelete="CASCADE"), primary_key=True, autoincrement=False,
+    )
+    ticket_count: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    __table_args__ = (Index("ix_seller_stats_ticket_count", "ticket_count"),)
+
+
+class OutboxMessage(Base):
+    """A pending broadcast to an event's subscribers, written in the same transaction as the ticket change."""
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    event_id: Mapped[int] = mapped_column(ForeignKey("events.id"))
+    exclude_telegram_id: Mapped[int | None] = mapped_column(BigInteger)
+    body: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    locked_until: Mapped[datetime | None] = mapped_column(default=None)
+    # Token of the claim holding the lease; progress writes from an older claim are ignored
+    locked_by: Mapped[str | None] = mapped_column(String(32))
+    last_recipient_id: Mapped[int | None] = mapped_column(BigInteger)
+    sent_count: Mapped[int] = mapped_column(Integer, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, default=0)
+    throttled_count: Mapped[int] = mapped_column(Integer, default=0)
+    sent_at: Mapped[datetime | None] = mapped_column(default=None)
+    # Dead letter: set instead of sent_at once delivery has been attempted OUTBOX_MAX_ATTEMPTS times
+    failed_at: Mapped[datetime | None] = mapped_column(default=None)
+
+    __table_args__ = (
+        Index("ix_outbox_pending", "id", postgresql_where=text("sent_at IS NULL AND failed_at IS NULL")),
+        Index("ix_outbox_sent_at", "sent_at", postgresql_where=text("sent_at IS NOT NULL")),
+    )
+
+
+class ProcessedUpdate(Base):
+    """Telegram update ids already accepted by some replica, for cross-replica deduplication."""
+    __tablename__ = "processed_updates"
+
+    update_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    received_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_processed_updates_received_at", "received_at"),)
+
+
+class FsmRecord(Base):
+    """Conversation state and data of one FSM key, shared by all bot processes."""
+    __tablename__ = "fsm_states"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str | None] = mapped_column(String(255))
+    data: Mapped[dict] = mapped_column(JSONB, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column()
+
+    __table_args__ = (Index("ix_fsm_states_expires_at", "expires_at"),)
+
+
+class ActivityRollup(Base):
+    """Count of one activity metric (signups, ticket posts, ...) in one hour or day bucket."""
+    __tablename__ = "activity_rollups"
+
+    granularity: Mapped[str] = mapped_column(String(10), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(50), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class RollupState(Base):
+    """Buckets of a granularity that start before ``frozen_until`` are final and never recomputed."""
+    __tablename__ = "rollup_state"
+
+    granularity: Mapped[str] = mapped_column(String(10), primary_key=True)
+    frozen_until: Mapped[datetime | None] = mapped_column(default=None)
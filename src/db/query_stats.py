@@ -0,0 +1,164 @@
+"""SQL statement timing grouped by fingerprint, with a slow-query log and optional EXPLAIN ANALYZE."""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import QUERY_EXPLAIN_INTERVAL, QUERY_EXPLAIN_SLOW, QUERY_SLOW_MS, QUERY_STATS_SIZE
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_LENGTH = 500
+EXPLAIN_TIMEOUT_MS = 30_000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalise ``statement`` so runs that differ only in literals, parameters or list lengths group together."""
+    text = _STRING.sub("?", statement)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _LIST.sub("(?, ...)", text)
+    text = _ROWS.sub("(?, ...), ...", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def _explainable(statement: str) -> bool:
+    # EXPLAIN ANALYZE runs the statement again, so only plain reads qualify
+    head = statement.lstrip()[:6].upper()
+    return head == "SELECT" and "FOR UPDATE" not in statement.upper()
+
+
+@dataclass
+class QueryStat:
+    fingerprint: str
+    calls: int = 0
+    total: float = 0.0  # seconds
+    max: float = 0.0
+    slow_calls: int = 0
+    sample: str = ""  # the slowest run so far, with its parameters
+    sample_params: str = ""
+    plan: str | None = None
+    explained_at: float = 0.0
+
+    @property
+    def id(self) -> str:
+        return hashlib.sha1(self.fingerprint.encode()).hexdigest()[:12]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class QueryStats:
+    """Time every statement the engine runs and aggregate by ``fingerprint``.
+
+    The hooks run synchronously on the event loop, so the aggregation is plain dict updates;
+    fingerprints are memoised per statement text, which SQLAlchemy's compiled cache keeps
+    stable. At most ``max_entries`` fingerprints are kept, the cheapest by total time making
+    way for new ones. A statement slower than ``slow_ms`` is logged and, with ``explain``,
+    a slow SELECT is re-run once per ``explain_interval`` under EXPLAIN ANALYZE on a separate
+    connection so its plan shows next to its timings. Values are per process.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_STATS_SIZE,
+        slow_ms: float = QUERY_SLOW_MS,
+        explain: bool = QUERY_EXPLAIN_SLOW,
+        explain_interval: float = QUERY_EXPLAIN_INTERVAL,
+    ):
+        self.max_entries = max_entries
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.since = time.time()
+        self._stats: dict[str, QueryStat] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._engine: AsyncEngine | None = None
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()
+
+    def install(self, engine: AsyncEngine):
+        self._engine = engine
+        sa_event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        sa_event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context.execution_options.get("skip_query_stats"):
+            return
+        self.record(statement, parameters, time.perf_counter() - context._query_start, not executemany)
+
+    def record(self, statement: str, parameters, seconds: float, explainable: bool = True):
+        key = self._fingerprints.get(statement)
+        if key is None:
+            if len(self._fingerprints) >= self.max_entries * 4:
+                self._fingerprints.clear()
+            key = self._fingerprints[statement] = fingerprint(statement)
+        stat = self._stats.get(key)
+        if stat is None:
+            if len(self._stats) >= self.max_entries:
+                del self._stats[min(self._stats.values(), key=lambda s: s.total).fingerprint]
+            stat = self._stats[key] = QueryStat(key)
+        stat.calls += 1
+        stat.total += seconds
+        if seconds > stat.max:
+            stat.max = seconds
+            stat.sample = statement
+            stat.sample_params = repr(parameters)[:SAMPLE_LENGTH]
+
+        if seconds * 1000 < self.slow_ms:
+            return
+        stat.slow_calls += 1
+        logger.warning(
+            "Slow query (%.1f ms): %s; parameters %s",
+            seconds * 1000, _SPACE.sub(" ", statement)[:SAMPLE_LENGTH], repr(parameters)[:SAMPLE_LENGTH],
+        )
+        if (
+            self.explain and explainable and not self._explaining and self._engine is not None
+            and time.monotonic() - stat.explained_at > self.explain_interval and _explainable(statement)
+        ):
+            self._explaining = True
+            stat.explained_at = time.monotonic()
+            task = asyncio.get_running_loop().create_task(self._explain(stat, statement, parameters))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, stat: QueryStat, statement: str, parameters):
+        try:
+            async with self._engine.connect() as conn:
+                conn = await conn.execution_options(skip_query_stats=True)
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                stat.plan = "\n".join(row[0] for row in result)
+                await conn.rollback()
+        except Exception:
+            logger.exception("EXPLAIN ANALYZE of a slow query failed")
+        finally:
+            self._explaining = False
+
+    def top(self, sort: str = "total", limit: int = 50) -> list[QueryStat]:
+        """The ``limit`` heaviest fingerprints by ``sort``: total, mean, max, calls or slow_calls."""
+        return sorted(self._stats.values(), key=lambda s: getattr(s, sort), reverse=True)[:limit]
+
+    def reset(self):
+        self._stats.clear()
+        self.since = time.time()
+
+
+query_stats = QueryStats()
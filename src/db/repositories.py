@@ -1,30 +1,46 @@
 import logging
-from datetime import date, datetime
+import uuid
+from datetime import date, datetime, time, timedelta
 
-from sqlalchemy import select, delete as sa_delete
+from sqlalchemy import select, exists, func, or_, case, literal, literal_column, update, BigInteger, delete as sa_delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from src.db.models import User, BlockedUser, Event, Registration, Ticket
+from src.db.models import (
+    User, BlockedUser, Event, Registration, Ticket, OutboxMessage, ProcessedUpdate, FsmRecord,
+    ActivityRollup, RollupState, EVENT_START_SORT_KEY,
+)
+from src.db.blocked_cache import blocked_cache, NOTIFY_CHANNEL
+from src import cache
+from src.cache import page_cache
 
 logger = logging.getLogger(__name__)
 
 
 def _parse_event_date(date_str: str) -> date | None:
-    """Parse event date string into a date object. Handles YYYY-MM-DD and D.M.YY formats."""
-    for fmt in ("%Y-%m-%d", "%d.%m.%y"):
+    """Parse event date string into a date object. Handles YYYY-MM-DD, D.M.YY and D/M/YYYY formats."""
+    for fmt in ("%Y-%m-%d", "%d.%m.%y", "%d/%m/%Y"):
         try:
-            return datetime.strptime(date_str, fmt).date()
+            return datetime.strptime(date_str.strip(), fmt).date()
         except ValueError:
             continue
     return None
 
 
-def _is_future_event(event: "Event") -> bool:
-    parsed = _parse_event_date(event.date)
+def _event_starts_at(date_str: str, time_str: str | None) -> datetime | None:
+    """Combine the free-text event date and time into a timestamp; None if the date is unparseable."""
+    parsed = _parse_event_date(date_str)
     if parsed is None:
-        return True  # keep events with unparseable dates visible
-    return parsed >= date.today()
+        return None
+    try:
+        start_time = datetime.strptime(time_str.strip(), "%H:%M").time() if time_str else time.min
+    except ValueError:
+        start_time = time.min
+    return datetime.combine(parsed, start_time)
+
+
+def _today_start() -> datetime:
+    return datetime.combine(date.today(), time.min)
 
 
 # --- Users ---
@@ -38,6 +54,24 @@ async def upsert_user(session: AsyncSession, telegram_id: int, username: str | N
     )
     await session.execute(stmt)
     await session.commit()
+    page_cache.invalidate(cache.USERS)
+
+
+async def upsert_users(session: AsyncSession, profiles: list[tuple[int, str | None, str | None]], chunk_size: int = 1000):
+    """Upsert many (telegram_id, username, first_name) rows with multi-row INSERT ... ON CONFLICT statements."""
+    for start in range(0, len(profiles), chunk_size):
+        chunk = profiles[start:start + chunk_size]
+        stmt = pg_insert(User).values([
+            {"telegram_id": telegram_id, "username": username, "first_name": first_name}
+            for telegram_id, username, first_name in chunk
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={"username": stmt.excluded.username, "first_name": stmt.excluded.first_name},
+        )
+        await session.execute(stmt)
+    await session.commit()
+    page_cache.invalidate(cache.USERS)
 
 
 async def is_blocked(session: AsyncSession, telegram_id: int) -> bool:
@@ -55,32 +89,42 @@ async def block_user(session: AsyncSession, telegram_id: int, reason: str | None
         set_={"reason": reason},
     )
     await session.execute(stmt)
+    await session.execute(select(func.pg_notify(NOTIFY_CHANNEL, f"block:{telegram_id}")))
     await session.commit()
+    page_cache.invalidate(cache.BLOCKED)
+    blocked_cache.add(telegram_id)
 
 
 async def unblock_user(session: AsyncSession, telegram_id: int):
     await session.execute(
         sa_delete(BlockedUser).where(BlockedUser.telegram_id == telegram_id)
     )
+    await session.execute(select(func.pg_notify(NOTIFY_CHANNEL, f"unblock:{telegram_id}")))
     await session.commit()
+    page_cache.invalidate(cache.BLOCKED)
+    blocked_cache.discard(telegram_id)
 
 
 # --- Events ---
 
 async def add_event(session: AsyncSession, name: str, date: str, time: str | None = None, location: str | None = None) -> int:
-    event = Event(name=name, date=date, time=time, location=location)
+    event = Event(name=name, date=date, time=time, location=location, starts_at=_event_starts_at(date, time))
     session.add(event)
     await session.commit()
+    page_cache.invalidate(cache.EVENTS)
     await session.refresh(event)
     return event.id
 
 
-async def get_active_events(session: AsyncSession) -> list[Event]:
+async def get_active_events(session: AsyncSession, limit: int | None = None) -> list[Event]:
+    """Return active events from today onwards, soonest first."""
     result = await session.execute(
-        select(Event).where(Event.active == True).order_by(Event.date)
+        select(Event)
+        .where(Event.active == True, EVENT_START_SORT_KEY >= _today_start())
+        .order_by(EVENT_START_SORT_KEY, Event.id)
+        .limit(limit)
     )
-    events = list(result.scalars().all())
-    return [e for e in events if _is_future_event(e)]
+    return list(result.scalars().all())
 
 
 async def get_event(session: AsyncSession, event_id: int) -> Event | None:
@@ -95,6 +139,7 @@ async def remove_event(session: AsyncSession, event_id: int):
     if event:
         event.active = False
         await session.commit()
+        page_cache.invalidate(cache.EVENTS)
 
 
 async def sync_scraped_events(session: AsyncSession, games: list) -> int:
@@ -106,12 +151,16 @@ async def sync_scraped_events(session: AsyncSession, games: list) -> int:
     for g in games:
         if (g.name, g.date) in existing_keys:
             continue
-        event = Event(name=g.name, date=g.date, time=g.time, location=g.location)
+        event = Event(
+            name=g.name, date=g.date, time=g.time, location=g.location,
+            starts_at=_event_starts_at(g.date, g.time),
+        )
         session.add(event)
         added += 1
 
     if added:
         await session.commit()
+        page_cache.invalidate(cache.EVENTS)
     logger.info("Synced events: %d new, %d already existed", added, len(games) - added)
     return added
 
@@ -124,6 +173,7 @@ async def register_for_event(session: AsyncSession, telegram_id: int, event_id:
     ).on_conflict_do_nothing()
     result = await session.execute(stmt)
     await session.commit()
+    page_cache.invalidate(cache.REGISTRATIONS)
     return result.rowcount > 0
 
 
@@ -135,6 +185,7 @@ async def unregister_from_event(session: AsyncSession, telegram_id: int, event_i
         )
     )
     await session.commit()
+    page_cache.invalidate(cache.REGISTRATIONS)
     return result.rowcount > 0
 
 
@@ -142,11 +193,14 @@ async def get_user_registrations(session: AsyncSession, telegram_id: int) -> lis
     result = await session.execute(
         select(Event)
         .join(Registration, Registration.event_id == Event.id)
-        .where(Registration.telegram_id == telegram_id, Event.active == True)
-        .order_by(Event.date)
+        .where(
+            Registration.telegram_id == telegram_id,
+            Event.active == True,
+            EVENT_START_SORT_KEY >= _today_start(),
+        )
+        .order_by(EVENT_START_SORT_KEY, Event.id)
     )
-    events = list(result.scalars().all())
-    return [e for e in events if _is_future_event(e)]
+    return list(result.scalars().all())
 
 
 async def get_registered_users(session: AsyncSession, event_id: int) -> list[int]:
@@ -156,12 +210,48 @@ async def get_registered_users(session: AsyncSession, event_id: int) -> list[int
     return list(result.scalars().all())
 
 
+def _alert_recipients_query(event_id: int, exclude_telegram_id: int | None, after_telegram_id: int | None):
+    stmt = (
+        select(Registration.telegram_id)
+        .where(
+            Registration.event_id == event_id,
+            ~exists().where(BlockedUser.telegram_id == Registration.telegram_id),
+        )
+        .order_by(Registration.telegram_id)
+    )
+    if exclude_telegram_id is not None:
+        stmt = stmt.where(Registration.telegram_id != exclude_telegram_id)
+    if after_telegram_id is not None:
+        stmt = stmt.where(Registration.telegram_id > after_telegram_id)
+    return stmt
+
+
+async def get_alert_recipients_page(
+    session: AsyncSession, event_id: int, exclude_telegram_id: int | None = None,
+    after_telegram_id: int | None = None, limit: int = 500,
+) -> list[int]:
+    """Return up to ``limit`` registered, non-blocked users of an event with telegram_id above ``after_telegram_id``, in order."""
+    result = await session.execute(
+        _alert_recipients_query(event_id, exclude_telegram_id, after_telegram_id).limit(limit)
+    )
+    return list(result.scalars().all())
+
+
 # --- Tickets ---
 
-async def add_ticket(session: AsyncSession, event_id: int, seller_telegram_id: int, description: str | None = None) -> int:
+async def add_ticket(
+    session: AsyncSession, event_id: int, seller_telegram_id: int, description: str | None = None,
+    alert_text: str | None = None,
+) -> int:
+    """Insert a ticket; if ``alert_text`` is given, queue the subscriber alert in the same transaction."""
     ticket = Ticket(event_id=event_id, seller_telegram_id=seller_telegram_id, description=description)
     session.add(ticket)
+    if alert_text:
+        session.add(OutboxMessage(
+            kind="ticket_alert", event_id=event_id, exclude_telegram_id=seller_telegram_id, body=alert_text,
+        ))
     await session.commit()
+    page_cache.invalidate(cache.TICKETS)
     await session.refresh(ticket)
     return ticket.id
 
@@ -213,8 +303,243 @@ async def get_seller_tickets(session: AsyncSession, seller_telegram_id: int) ->
     ]
 
 
-async def delete_ticket(session: AsyncSession, ticket_id: int):
+async def delete_ticket(session: AsyncSession, ticket_id: int, notice_text: str | None = None):
+    """Soft-delete a ticket; if ``notice_text`` is given, queue the "sold" notice in the same transaction."""
     ticket = await get_ticket(session, ticket_id)
     if ticket:
         ticket.deleted_at = datetime.utcnow()
+        if notice_text:
+            session.add(OutboxMessage(
+                kind="ticket_sold", event_id=ticket.event_id,
+                exclude_telegram_id=ticket.seller_telegram_id, body=notice_text,
+            ))
         await session.commit()
+        page_cache.invalidate(cache.TICKETS)
+
+
+# --- Outbox ---
+
+async def claim_outbox_messages(session: AsyncSession, batch_size: int, lease_seconds: float) -> list[OutboxMessage]:
+    """Lease up to ``batch_size`` undelivered messages that no other dispatcher is holding.
+
+    Rows are picked with FOR UPDATE SKIP LOCKED, so concurrent dispatchers never claim the same
+    message; the lease (``locked_until``) lets another dispatcher take over if this one dies.
+    Each claim stamps a fresh ``locked_by`` token, which every later write must present.
+    """
+    now = datetime.utcnow()
+    pending = (
+        select(OutboxMessage.id)
+        .where(
+            OutboxMessage.sent_at.is_(None),
+            OutboxMessage.failed_at.is_(None),
+            or_(OutboxMessage.locked_until.is_(None), OutboxMessage.locked_until < now),
+        )
+        .order_by(OutboxMessage.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.scalars(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(pending.scalar_subquery()))
+        .values(
+            locked_until=now + timedelta(seconds=lease_seconds),
+            locked_by=uuid.uuid4().hex,
+            attempts=OutboxMessage.attempts + 1,
+        )
+        .returning(OutboxMessage)
+    )
+    messages = sorted(result.all(), key=lambda m: m.id)
+    await session.commit()
+    return messages
+
+
+async def renew_outbox_leases(
+    session: AsyncSession, message_ids: list[int], token: str, lease_seconds: float,
+) -> set[int]:
+    """Extend the leases on ``message_ids`` still held under ``token``; return the ids that were."""
+    result = await session.scalars(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(message_ids), OutboxMessage.locked_by == token)
+        .values(locked_until=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        .returning(OutboxMessage.id)
+    )
+    held = set(result.all())
+    await session.commit()
+    return held
+
+
+async def checkpoint_outbox_message(
+    session: AsyncSession, message_id: int, token: str, last_recipient_id: int,
+    sent: int, failed: int, throttled: int,
+) -> bool:
+    """Record delivery progress; False if the lease has passed to another claim."""
+    result = await session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id == message_id, OutboxMessage.locked_by == token)
+        .values(
+            last_recipient_id=last_recipient_id,
+            sent_count=OutboxMessage.sent_count + sent,
+            failed_count=OutboxMessage.failed_count + failed,
+            throttled_count=OutboxMessage.throttled_count + throttled,
+        )
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
+async def complete_outbox_message(session: AsyncSession, message_id: int, token: str) -> bool:
+    result = await session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id == message_id, OutboxMessage.locked_by == token)
+        .values(sent_at=datetime.utcnow(), locked_until=None, locked_by=None)
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
+async def fail_outbox_message(session: AsyncSession, message_id: int, token: str):
+    """Dead-letter a message: it stays in the table for inspection but is never claimed again."""
+    await session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id == message_id, OutboxMessage.locked_by == token)
+        .values(failed_at=datetime.utcnow(), locked_until=None, locked_by=None)
+    )
+    await session.commit()
+
+
+# --- Update deduplication ---
+
+async def claim_update(session: AsyncSession, update_id: int) -> bool:
+    """Record an update id; False if another replica already recorded it."""
+    result = await session.execute(
+        pg_insert(ProcessedUpdate).values(update_id=update_id).on_conflict_do_nothing()
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
+async def release_update(session: AsyncSession, update_id: int):
+    await session.execute(sa_delete(ProcessedUpdate).where(ProcessedUpdate.update_id == update_id))
+    await session.commit()
+
+
+async def prune_processed_updates(session: AsyncSession, older_than: datetime) -> int:
+    result = await session.execute(sa_delete(ProcessedUpdate).where(ProcessedUpdate.received_at < older_than))
+    await session.commit()
+    return result.rowcount
+
+
+# --- FSM storage ---
+
+async def get_fsm_record(session: AsyncSession, key: str) -> FsmRecord | None:
+    result = await session.execute(
+        select(FsmRecord).where(FsmRecord.key == key, FsmRecord.expires_at > datetime.utcnow())
+    )
+    return result.scalar_one_or_none()
+
+
+async def _upsert_fsm_record(session: AsyncSession, key: str, ttl: float, **values):
+    """Write ``state`` or ``data`` for ``key``; the other field is kept unless the row has expired."""
+    now = datetime.utcnow()
+    stmt = pg_insert(FsmRecord).values(key=key, updated_at=now, expires_at=now + timedelta(seconds=ttl), **values)
+    expired = FsmRecord.expires_at <= now
+    keep = {
+        "state": case((expired, literal(None)), else_=FsmRecord.state),
+        "data": case((expired, literal({}, FsmRecord.data.type)), else_=FsmRecord.data),
+    }
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FsmRecord.key],
+        set_={
+            **{name: stmt.excluded[name] if name in values else keep[name] for name in keep},
+            "updated_at": stmt.excluded.updated_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+
+async def set_fsm_state(session: AsyncSession, key: str, state: str | None, ttl: float):
+    await _upsert_fsm_record(session, key, ttl, state=state)
+
+
+async def set_fsm_data(session: AsyncSession, key: str, data: dict, ttl: float):
+    await _upsert_fsm_record(session, key, ttl, data=data)
+
+
+async def prune_fsm_records(session: AsyncSession, batch_size: int) -> int:
+    """Delete up to ``batch_size`` expired FSM rows; returns how many were deleted."""
+    expired = (
+        select(FsmRecord.key)
+        .where(FsmRecord.expires_at <= datetime.utcnow())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(sa_delete(FsmRecord).where(FsmRecord.key.in_(expired)))
+    await session.commit()
+    return result.rowcount
+
+
+# --- Activity rollups ---
+
+# metric -> (timestamp column bucketed on, aggregate counted per bucket)
+ROLLUP_METRICS = {
+    "signups": (User.joined_at, func.count()),
+    "registrations": (Registration.registered_at, func.count()),
+    "ticket_posts": (Ticket.posted_at, func.count()),
+    "ticket_deletions": (Ticket.deleted_at, func.count()),
+    "alerts_sent": (OutboxMessage.sent_at, func.sum(OutboxMessage.sent_count)),
+}
+
+ROLLUP_COLUMNS = ["granularity", "metric", "bucket", "value"]
+
+
+def _floor(moment: datetime, granularity: str) -> datetime:
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == "day" else moment
+
+
+async def _clear_rollups(session: AsyncSession, granularity: str, start: datetime | None):
+    stmt = sa_delete(ActivityRollup).where(ActivityRollup.granularity == granularity)
+    if start is not None:
+        stmt = stmt.where(ActivityRollup.bucket >= start)
+    await session.execute(stmt)
+
+
+async def refresh_activity_rollups(session: AsyncSession, now: datetime, grace_seconds: float):
+    """Recompute the hourly and daily buckets that are not frozen yet, then freeze all but the recent ones.
+
+    Hourly buckets are counted from the source tables, starting at the hourly ``frozen_until``
+    (everything on the first run); daily buckets are summed from the hourly ones. Buckets that
+    started more than ``grace_seconds`` ago are then frozen, which leaves late commits time to land.
+    """
+    states = {
+        state.granularity: state
+        for state in (await session.execute(select(RollupState).with_for_update())).scalars()
+    }
+    hour_start = states["hour"].frozen_until
+    await _clear_rollups(session, "hour", hour_start)
+    for metric, (column, value) in ROLLUP_METRICS.items():
+        bucket = func.date_trunc("hour", column)
+        query = select(literal_column("'hour'"), literal_column(f"'{metric}'"), bucket, value.cast(BigInteger))
+        query = query.where(column.is_not(None)).group_by(bucket)
+        if hour_start is not None:
+            query = query.where(column >= hour_start)
+        await session.execute(pg_insert(ActivityRollup).from_select(ROLLUP_COLUMNS, query))
+
+    day_start = states["day"].frozen_until
+    await _clear_rollups(session, "day", day_start)
+    day = func.date_trunc("day", ActivityRollup.bucket)
+    query = (
+        select(literal_column("'day'"), ActivityRollup.metric, day, func.sum(ActivityRollup.value).cast(BigInteger))
+        .where(ActivityRollup.granularity == "hour")
+        .group_by(ActivityRollup.metric, day)
+    )
+    if day_start is not None:
+        query = query.where(ActivityRollup.bucket >= day_start)
+    await session.execute(pg_insert(ActivityRollup).from_select(ROLLUP_COLUMNS, query))
+
+    settled = now - timedelta(seconds=grace_seconds)
+    for granularity, state in states.items():
+        state.frozen_until = _floor(settled, granularity)
+    await session.commit()
@@ -1,5 +1,76 @@
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from src.config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE, DB_PREPARED_STATEMENT_CACHE_SIZE,
+)
+from src.db.query_stats import query_stats
+
+
+@dataclass
+class CheckoutStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+checkout_stats = CheckoutStats()
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            checkout_stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            checkout_stats.checkouts += 1
+            checkout_stats.wait_total += waited
+            checkout_stats.wait_max = max(checkout_stats.wait_max, waited)
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE,
+    },
+)
+query_stats.install(engine)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def pool_status() -> dict:
+    """Snapshot of the engine's pool: current occupancy plus cumulative checkout wait times."""
+    pool = engine.pool
+    stats = checkout_stats
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # QueuePool reports overflow as negative while fewer than pool_size connections are open
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_avg_ms": round(stats.wait_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+        "wait_max_ms": round(stats.wait_max * 1000, 3),
+    }
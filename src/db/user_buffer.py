@@ -0,0 +1,94 @@
+"""Coalesced user-profile writes."""
+
+import asyncio
+import logging
+from collections import OrderedDict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import USER_CACHE_SIZE, USER_FLUSH_INTERVAL
+from src.db.session import async_session
+from src.db import repositories as repo
+
+logger = logging.getLogger(__name__)
+
+Profile = tuple[str | None, str | None]
+
+
+class UserWriteBuffer:
+    """Skip upserts for unchanged profiles and batch the rest.
+
+    A user seen for the first time in this process is written immediately, because
+    registrations and tickets reference ``users`` by foreign key and must not race the
+    insert. After that, only username/first_name changes are queued, and the queue is
+    flushed as one multi-row upsert every ``flush_interval`` seconds and on shutdown.
+    """
+
+    def __init__(self, flush_interval: float = USER_FLUSH_INTERVAL, max_profiles: int = USER_CACHE_SIZE):
+        self.flush_interval = flush_interval
+        self.max_profiles = max_profiles
+        self._known: OrderedDict[int, Profile] = OrderedDict()
+        self._pending: dict[int, Profile] = {}
+        self._task: asyncio.Task | None = None
+
+    def _remember(self, telegram_id: int, profile: Profile):
+        self._known[telegram_id] = profile
+        self._known.move_to_end(telegram_id)
+        while len(self._known) > self.max_profiles:
+            self._known.popitem(last=False)
+
+    async def touch(
+        self, telegram_id: int, username: str | None, first_name: str | None, session: AsyncSession | None = None,
+    ):
+        """Record a profile sighting; writes through ``session`` (or a new one) only for first-seen users."""
+        profile = (username, first_name)
+        known = self._known.get(telegram_id)
+        if known == profile:
+            self._known.move_to_end(telegram_id)
+            return
+        if known is None:
+            if session is not None:
+                await repo.upsert_user(session, telegram_id, username, first_name)
+            else:
+                async with async_session() as session:
+                    await repo.upsert_user(session, telegram_id, username, first_name)
+        else:
+            self._pending[telegram_id] = profile
+        self._remember(telegram_id, profile)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            async with async_session() as session:
+                await repo.upsert_users(session, [(tid, *profile) for tid, profile in pending.items()])
+        except Exception:
+            # Keep the failed batch, but let newer changes queued meanwhile win
+            self._pending = {**pending, **self._pending}
+            raise
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush %d user profile updates", len(self._pending))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+user_buffer = UserWriteBuffer()
@@ -0,0 +1,86 @@
+"""Drop webhook redeliveries of updates that were already accepted."""
+
+import asyncio
+import logging
+from array import array
+from datetime import datetime, timedelta
+
+from src.config import DEDUP_SHARED, DEDUP_SHARED_TTL, DEDUP_WINDOW
+from src.db.session import async_session
+from src.db import repositories as repo
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 10 * 60
+
+
+class UpdateDeduplicator:
+    """Remember recently accepted update ids.
+
+    Telegram assigns update ids sequentially, so a fixed ring indexed by ``update_id % window``
+    holds exactly the last ``window`` ids in constant memory, and a lookup is one array read.
+    With ``shared`` enabled, ids not in the local ring are also claimed in the
+    ``processed_updates`` table so a redelivery that lands on another replica is caught too.
+    """
+
+    def __init__(self, window: int = DEDUP_WINDOW, shared: bool = DEDUP_SHARED, shared_ttl: int = DEDUP_SHARED_TTL):
+        self.window = window
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.duplicates = 0
+        self._ring = array("q", [-1]) * window
+        self._pruner: asyncio.Task | None = None
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """Mark ``update_id`` as accepted; True if it already was."""
+        slot = update_id % self.window
+        if self._ring[slot] == update_id:
+            self.duplicates += 1
+            return True
+        self._ring[slot] = update_id
+        if self.shared:
+            try:
+                async with async_session() as session:
+                    if not await repo.claim_update(session, update_id):
+                        self.duplicates += 1
+                        return True
+            except Exception:
+                # Better to risk a duplicate than to drop an update because the DB hiccuped
+                logger.exception("Shared dedup check failed for update %d", update_id)
+        return False
+
+    async def forget(self, update_id: int):
+        """Un-mark an update that was accepted but could not be queued, so its redelivery is processed."""
+        slot = update_id % self.window
+        if self._ring[slot] == update_id:
+            self._ring[slot] = -1
+        if self.shared:
+            async with async_session() as session:
+                await repo.release_update(session, update_id)
+
+    async def _prune(self):
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL)
+            try:
+                async with async_session() as session:
+                    cutoff = datetime.utcnow() - timedelta(seconds=self.shared_ttl)
+                    pruned = await repo.prune_processed_updates(session, cutoff)
+                logger.info("Pruned %d processed update ids", pruned)
+            except Exception:
+                logger.exception("Failed to prune processed update ids")
+
+    def start(self):
+        if self.shared and self._pruner is None:
+            self._pruner = asyncio.create_task(self._prune())
+
+    async def stop(self):
+        if self._pruner is not None:
+            self._pruner.cancel()
+            try:
+                await self._pruner
+            except asyncio.CancelledError:
+                pass
+            self._pruner = None
+
+
+deduplicator = UpdateDeduplicator()
@@ -3,9 +3,9 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKe
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import ADMIN_IDS
-from src.db.session import async_session
 from src.db import repositories as repo
 from src.handlers.user import _event_label
 
@@ -63,13 +63,12 @@ async def admin_add_event_cb(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "admin_removeevent")
-async def admin_remove_event_cb(callback: CallbackQuery, state: FSMContext):
+async def admin_remove_event_cb(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     if not is_admin(callback.from_user.id):
         await callback.answer("⛔ אין לך הרשאות מנהל.", show_alert=True)
         return
 
-    async with async_session() as session:
-        active_events = await repo.get_active_events(session)
+    active_events = await repo.get_active_events(session)
 
     if not active_events:
         await callback.message.edit_text("אין אירועים פעילים.")
@@ -138,15 +137,14 @@ async def add_event_time(message: Message, state: FSMContext):
 
 
 @router.message(AddEventFlow.enter_location)
-async def add_event_location(message: Message, state: FSMContext):
+async def add_event_location(message: Message, state: FSMContext, session: AsyncSession):
     location = message.text
     if location in ("דלג", "skip", "-"):
         location = None
 
     data = await state.get_data()
 
-    async with async_session() as session:
-        event_id = await repo.add_event(session, data["name"], data["date"], data["time"], location)
+    event_id = await repo.add_event(session, data["name"], data["date"], data["time"], location)
 
     await message.answer(
         f"✅ האירוע נוסף בהצלחה!\n\n"
@@ -162,13 +160,12 @@ async def add_event_location(message: Message, state: FSMContext):
 # --- Remove Event flow ---
 
 @router.message(Command("removeevent"))
-async def admin_remove_event_cmd(message: Message, state: FSMContext):
+async def admin_remove_event_cmd(message: Message, state: FSMContext, session: AsyncSession):
     if not is_admin(message.from_user.id):
         await message.answer("⛔ אין לך הרשאות מנהל.")
         return
 
-    async with async_session() as session:
-        active_events = await repo.get_active_events(session)
+    active_events = await repo.get_active_events(session)
 
     if not active_events:
         await message.answer("אין אירועים פעילים.")
@@ -183,12 +180,11 @@ async def admin_remove_event_cmd(message: Message, state: FSMContext):
 
 
 @router.callback_query(RemoveEventFlow.select_event, F.data.startswith("rmev_"))
-async def remove_event_selected(callback: CallbackQuery, state: FSMContext):
+async def remove_event_selected(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     event_id = int(callback.data.split("_")[1])
 
-    async with async_session() as session:
-        event = await repo.get_event(session, event_id)
-        await repo.remove_event(session, event_id)
+    event = await repo.get_event(session, event_id)
+    await repo.remove_event(session, event_id)
 
     await callback.message.edit_text(f"✅ האירוע <b>{event.name}</b> הוסר.")
     await state.clear()
@@ -207,15 +203,14 @@ async def admin_block_cmd(message: Message, state: FSMContext):
 
 
 @router.message(BlockFlow.enter_id)
-async def block_user_id(message: Message, state: FSMContext):
+async def block_user_id(message: Message, state: FSMContext, session: AsyncSession):
     try:
         target_id = int(message.text.strip())
     except ValueError:
         await message.answer("❌ מזהה לא תקין. שלחו מספר בלבד.")
         return
 
-    async with async_session() as session:
-        await repo.block_user(session, target_id)
+    await repo.block_user(session, target_id)
 
     await message.answer(f"✅ המשתמש {target_id} נחסם בהצלחה.")
     await state.clear()
@@ -231,15 +226,14 @@ async def admin_unblock_cmd(message: Message, state: FSMContext):
 
 
 @router.message(UnblockFlow.enter_id)
-async def unblock_user_id(message: Message, state: FSMContext):
+async def unblock_user_id(message: Message, state: FSMContext, session: AsyncSession):
     try:
         target_id = int(message.text.strip())
     except ValueError:
         await message.answer("❌ מזהה לא תקין. שלחו מספר בלבד.")
         return
 
-    async with async_session() as session:
-        await repo.unblock_user(session, target_id)
+    await repo.unblock_user(session, target_id)
 
     await message.answer(f"✅ המשתמש {target_id} שוחרר מחסימה.")
     await state.clear()
@@ -1,14 +1,15 @@
 import logging
 import re
-from aiogram import Router, F, Bot
+from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import async_session
 from src.db import repositories as repo
-from src.handlers.user import is_blocked, ensure_user, _event_label
+from src.outbox import outbox
+from src.handlers.user import _event_label
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -24,14 +25,12 @@ class SellFlow(StatesGroup):
 
 @router.message(Command("sell"))
 @router.message(F.text == "💰 מוכר כרטיס")
-async def sell_start(message: Message, state: FSMContext):
-    if await is_blocked(message.from_user.id):
+async def sell_start(message: Message, state: FSMContext, blocked: bool, session: AsyncSession):
+    if blocked:
         await message.answer("⛔ אתה חסום ואינך יכול להשתמש בבוט זה.")
         return
-    await ensure_user(message.from_user.id, message.from_user.username, message.from_user.first_name)
 
-    async with async_session() as session:
-        active_events = await repo.get_active_events(session)
+    active_events = await repo.get_active_events(session)
 
     if not active_events:
         await message.answer("אין אירועים זמינים כרגע.")
@@ -49,12 +48,11 @@ async def sell_start(message: Message, state: FSMContext):
 
 
 @router.callback_query(SellFlow.select_event, F.data.startswith("sell_"))
-async def sell_event_selected(callback: CallbackQuery, state: FSMContext):
+async def sell_event_selected(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     event_id = int(callback.data.split("_")[1])
     await state.update_data(event_id=event_id)
 
-    async with async_session() as session:
-        event = await repo.get_event(session, event_id)
+    event = await repo.get_event(session, event_id)
 
     await callback.message.edit_text(
         f"📅 אירוע: <b>{event.name}</b>\n\n🏟 הזינו <b>אזור / יציע</b>:",
@@ -91,7 +89,7 @@ def _is_valid_phone(phone: str) -> bool:
 
 
 @router.message(SellFlow.enter_phone)
-async def sell_phone(message: Message, state: FSMContext, bot: Bot):
+async def sell_phone(message: Message, state: FSMContext, session: AsyncSession):
     if not _is_valid_phone(message.text):
         await message.answer(
             "❌ מספר טלפון לא תקין.\n"
@@ -108,15 +106,26 @@ async def sell_phone(message: Message, state: FSMContext, bot: Bot):
     price = data["price"]
     seller_id = message.from_user.id
 
-    async with async_session() as session:
-        event = await repo.get_event(session, event_id)
-        description = f"אזור / יציע: {section}\nכמות: {quantity}\nמחיר: {price}\nטלפון: {phone}"
-        ticket_id = await repo.add_ticket(session, event_id, seller_id, description)
-        registered_users = await repo.get_registered_users(session, event_id)
-
     seller_name = message.from_user.first_name or message.from_user.username or "משתמש"
     seller_handle = f"@{message.from_user.username}" if message.from_user.username else seller_name
 
+    event = await repo.get_event(session, event_id)
+    description = f"אזור / יציע: {section}\nכמות: {quantity}\nמחיר: {price}\nטלפון: {phone}"
+    alert_text = (
+        f"🚨 <b>כרטיס חדש זמין!</b>\n\n"
+        f"📅 אירוע: <b>{event.name}</b>\n"
+        f"🗓 תאריך: {event.date}\n"
+        f"🕐 שעה: {event.time or 'לא צוין'}\n"
+        f"🏟 אזור / יציע: {section}\n"
+        f"🎫 כמות: {quantity}\n"
+        f"💰 מחיר: {price}\n"
+        f"📞 טלפון: {phone}\n\n"
+        f"👤 מוכר: {seller_handle}\n\n"
+        "צרו קשר ישירות עם המוכר!"
+    )
+    ticket_id = await repo.add_ticket(session, event_id, seller_id, description, alert_text=alert_text)
+    outbox.wake()
+
     delete_button = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🗑 מחיקת כרטיס (מצאתי קונה)", callback_data=f"delticket_{ticket_id}")]
     ])
@@ -131,60 +140,25 @@ async def sell_phone(message: Message, state: FSMContext, bot: Bot):
         "מצאת קונה? לחצו על הכפתור למטה למחיקת הכרטיס.",
         reply_markup=delete_button,
     )
-
-    alert_text = (
-        f"🚨 <b>כרטיס חדש זמין!</b>\n\n"
-        f"📅 אירוע: <b>{event.name}</b>\n"
-        f"🗓 תאריך: {event.date}\n"
-        f"🕐 שעה: {event.time or 'לא צוין'}\n"
-        f"🏟 אזור / יציע: {section}\n"
-        f"🎫 כמות: {quantity}\n"
-        f"💰 מחיר: {price}\n"
-        f"📞 טלפון: {phone}\n\n"
-        f"👤 מוכר: {seller_handle}\n\n"
-        "צרו קשר ישירות עם המוכר!"
-    )
-
-    sent_count = 0
-    for user_id in registered_users:
-        if user_id == seller_id:
-            continue
-        async with async_session() as session:
-            if await repo.is_blocked(session, user_id):
-                continue
-        try:
-            await bot.send_message(user_id, alert_text)
-            sent_count += 1
-        except Exception as e:
-            logger.warning(f"Failed to send alert to {user_id}: {e}")
-
-    logger.info(f"Ticket #{ticket_id} alert sent to {sent_count} users for event {event.name}")
     await state.clear()
 
 
 @router.callback_query(F.data.startswith("delticket_"))
-async def delete_ticket(callback: CallbackQuery, bot: Bot):
+async def delete_ticket(callback: CallbackQuery, session: AsyncSession):
     ticket_id = int(callback.data.split("_")[1])
 
-    async with async_session() as session:
-        ticket = await repo.get_ticket(session, ticket_id)
-
-        if not ticket:
-            await callback.message.edit_text("הכרטיס כבר נמחק.")
-            await callback.answer()
-            return
-
-        if ticket.seller_telegram_id != callback.from_user.id:
-            await callback.answer("רק המוכר יכול למחוק את הכרטיס.", show_alert=True)
-            return
+    ticket = await repo.get_ticket(session, ticket_id)
 
-        event = await repo.get_event(session, ticket.event_id)
-        registered_users = await repo.get_registered_users(session, ticket.event_id)
-        await repo.delete_ticket(session, ticket_id)
+    if not ticket:
+        await callback.message.edit_text("הכרטיס כבר נמחק.")
+        await callback.answer()
+        return
 
-    await callback.message.edit_text("✅ הכרטיס נמחק בהצלחה.")
-    await callback.answer()
+    if ticket.seller_telegram_id != callback.from_user.id:
+        await callback.answer("רק המוכר יכול למחוק את הכרטיס.", show_alert=True)
+        return
 
+    event = await repo.get_event(session, ticket.event_id)
     seller_name = callback.from_user.first_name or callback.from_user.username or "משתמש"
     notice_text = (
         f"📢 <b>כרטיס נמכר</b>\n\n"
@@ -192,26 +166,21 @@ async def delete_ticket(callback: CallbackQuery, bot: Bot):
         f"👤 מוכר: {seller_name}\n\n"
         "הכרטיס כבר לא זמין."
     )
+    await repo.delete_ticket(session, ticket_id, notice_text=notice_text)
+    outbox.wake()
 
-    for user_id in registered_users:
-        if user_id == callback.from_user.id:
-            continue
-        try:
-            await bot.send_message(user_id, notice_text)
-        except Exception as e:
-            logger.warning(f"Failed to send delete notice to {user_id}: {e}")
+    await callback.message.edit_text("✅ הכרטיס נמחק בהצלחה.")
+    await callback.answer()
 
 
 @router.message(Command("mytickets"))
 @router.message(F.text == "🎟 כרטיסים שפרסמתי")
-async def my_tickets(message: Message):
-    if await is_blocked(message.from_user.id):
+async def my_tickets(message: Message, blocked: bool, session: AsyncSession):
+    if blocked:
         await message.answer("⛔ אתה חסום ואינך יכול להשתמש בבוט זה.")
         return
-    await ensure_user(message.from_user.id, message.from_user.username, message.from_user.first_name)
 
-    async with async_session() as session:
-        tickets = await repo.get_seller_tickets(session, message.from_user.id)
+    tickets = await repo.get_seller_tickets(session, message.from_user.id)
 
     if not tickets:
         await message.answer("אין לך כרטיסים מפורסמים כרגע.")
@@ -1,9 +1,9 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from aiogram.filters import Command
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import ADMIN_IDS
-from src.db.session import async_session
 from src.db import repositories as repo
 
 router = Router()
@@ -19,22 +19,11 @@ def get_main_keyboard(user_id: int) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 
-async def ensure_user(telegram_id: int, username: str | None, first_name: str | None):
-    async with async_session() as session:
-        await repo.upsert_user(session, telegram_id, username, first_name)
-
-
-async def is_blocked(telegram_id: int) -> bool:
-    async with async_session() as session:
-        return await repo.is_blocked(session, telegram_id)
-
-
 @router.message(Command("start"))
-async def start(message: Message):
-    if await is_blocked(message.from_user.id):
+async def start(message: Message, blocked: bool):
+    if blocked:
         await message.answer("⛔ אתה חסום ואינך יכול להשתמש בבוט זה.")
         return
-    await ensure_user(message.from_user.id, message.from_user.username, message.from_user.first_name)
     keyboard = get_main_keyboard(message.from_user.id)
     first_name = message.from_user.first_name or "אורח/ת"
     await message.answer(
@@ -64,8 +53,8 @@ async def start(message: Message):
 
 @router.message(Command("help"))
 @router.message(F.text == "❓ עזרה")
-async def help_command(message: Message):
-    if await is_blocked(message.from_user.id):
+async def help_command(message: Message, blocked: bool):
+    if blocked:
         await message.answer("⛔ אתה חסום ואינך יכול להשתמש בבוט זה.")
         return
     await message.answer(
@@ -102,21 +91,17 @@ def _event_label(event) -> str:
 
 @router.message(Command("events"))
 @router.message(F.text == "🔎 מחפש כרטיס")
-async def events(message: Message):
-    if await is_blocked(message.from_user.id):
+async def events(message: Message, blocked: bool, session: AsyncSession):
+    if blocked:
         await message.answer("⛔ אתה חסום ואינך יכול להשתמש בבוט זה.")
         return
-    await ensure_user(message.from_user.id, message.from_user.username, message.from_user.first_name)
 
-    async with async_session() as session:
-        active_events = await repo.get_active_events(session)
+    active_events = await repo.get_active_events(session, limit=5)
 
     if not active_events:
         await message.answer("אין אירועים זמינים כרגע.")
         return
 
-    active_events = active_events[:5]
-
     keyboard = []
     for event in active_events:
         keyboard.append([InlineKeyboardButton(text=_event_label(event), callback_data=f"event_{event.id}")])
@@ -128,21 +113,20 @@ async def events(message: Message):
 
 
 @router.callback_query(F.data.startswith("event_"))
-async def event_selected(callback: CallbackQuery):
-    if await is_blocked(callback.from_user.id):
+async def event_selected(callback: CallbackQuery, blocked: bool, session: AsyncSession):
+    if blocked:
         await callback.answer("⛔ אתה חסום.", show_alert=True)
         return
 
     event_id = int(callback.data.split("_")[1])
 
-    async with async_session() as session:
-        event = await repo.get_event(session, event_id)
-        if not event:
-            await callback.message.edit_text("האירוע לא נמצא.")
-            await callback.answer()
-            return
+    event = await repo.get_event(session, event_id)
+    if not event:
+        await callback.message.edit_text("האירוע לא נמצא.")
+        await callback.answer()
+        return
 
-        registrations = await repo.get_user_registrations(session, callback.from_user.id)
+    registrations = await repo.get_user_registrations(session, callback.from_user.id)
 
     is_registered = any(r.id == event_id for r in registrations)
 
@@ -166,17 +150,15 @@ async def event_selected(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("reg_"))
-async def register_event(callback: CallbackQuery):
-    if await is_blocked(callback.from_user.id):
+async def register_event(callback: CallbackQuery, blocked: bool, session: AsyncSession):
+    if blocked:
         await callback.answer("⛔ אתה חסום.", show_alert=True)
         return
 
     event_id = int(callback.data.split("_")[1])
-    await ensure_user(callback.from_user.id, callback.from_user.username, callback.from_user.first_name)
 
-    async with async_session() as session:
-        registered = await repo.register_for_event(session, callback.from_user.id, event_id)
-        event = await repo.get_event(session, event_id)
+    registered = await repo.register_for_event(session, callback.from_user.id, event_id)
+    event = await repo.get_event(session, event_id)
 
     if registered:
         kb = [[InlineKeyboardButton(text="🎫 צפייה בכרטיסים זמינים", callback_data=f"viewtickets_{event_id}")]]
@@ -194,12 +176,11 @@ async def register_event(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("unreg_"))
-async def unregister_event(callback: CallbackQuery):
+async def unregister_event(callback: CallbackQuery, session: AsyncSession):
     event_id = int(callback.data.split("_")[1])
 
-    async with async_session() as session:
-        unregistered = await repo.unregister_from_event(session, callback.from_user.id, event_id)
-        event = await repo.get_event(session, event_id)
+    unregistered = await repo.unregister_from_event(session, callback.from_user.id, event_id)
+    event = await repo.get_event(session, event_id)
 
     back_kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🔙 חזרה לאירועים", callback_data="back_events")]
@@ -216,14 +197,12 @@ async def unregister_event(callback: CallbackQuery):
 
 @router.message(Command("myevents"))
 @router.message(F.text == "📋 אירועים שנרשמתי להתראות")
-async def my_events(message: Message):
-    if await is_blocked(message.from_user.id):
+async def my_events(message: Message, blocked: bool, session: AsyncSession):
+    if blocked:
         await message.answer("⛔ אתה חסום ואינך יכול להשתמש בבוט זה.")
         return
-    await ensure_user(message.from_user.id, message.from_user.username, message.from_user.first_name)
 
-    async with async_session() as session:
-        registrations = await repo.get_user_registrations(session, message.from_user.id)
+    registrations = await repo.get_user_registrations(session, message.from_user.id)
 
     if not registrations:
         await message.answer("לא נרשמת לאף אירוע עדיין.\nלחצו על <b>אירועים זמינים</b> כדי להירשם.")
@@ -240,16 +219,15 @@ async def my_events(message: Message):
 
 
 @router.callback_query(F.data.startswith("viewtickets_"))
-async def view_tickets(callback: CallbackQuery):
+async def view_tickets(callback: CallbackQuery, session: AsyncSession):
     event_id = int(callback.data.split("_")[1])
 
-    async with async_session() as session:
-        event = await repo.get_event(session, event_id)
-        if not event:
-            await callback.message.edit_text("האירוע לא נמצא.")
-            await callback.answer()
-            return
-        tickets = await repo.get_active_tickets(session, event_id)
+    event = await repo.get_event(session, event_id)
+    if not event:
+        await callback.message.edit_text("האירוע לא נמצא.")
+        await callback.answer()
+        return
+    tickets = await repo.get_active_tickets(session, event_id)
 
     back_kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🔙 חזרה לאירוע", callback_data=f"event_{event_id}")]
@@ -278,16 +256,14 @@ async def view_tickets(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "back_events")
-async def back_to_events(callback: CallbackQuery):
-    async with async_session() as session:
-        active_events = await repo.get_active_events(session)
+async def back_to_events(callback: CallbackQuery, session: AsyncSession):
+    active_events = await repo.get_active_events(session, limit=5)
 
     if not active_events:
         await callback.message.edit_text("אין אירועים זמינים כרגע.")
         await callback.answer()
         return
 
-    active_events = active_events[:5]
     keyboard = []
     for event in active_events:
         keyboard.append([InlineKeyboardButton(text=_event_label(event), callback_data=f"event_{event.id}")])
@@ -0,0 +1,141 @@
+"""Queue webhook updates and process them on a worker pool so the webhook can return at once."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from src.config import WEBHOOK_DRAIN_TIMEOUT, WEBHOOK_ENQUEUE_TIMEOUT, WEBHOOK_QUEUE_SIZE, WEBHOOK_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def _chat_key(update: Update) -> int:
+    """Key that groups updates which must be handled in order: the chat, else the sender."""
+    event = update.event
+    chat = getattr(event, "chat", None) or getattr(getattr(event, "message", None), "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    return update.update_id
+
+
+@dataclass
+class IngestStats:
+    enqueued: int = 0
+    processed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    max_depth: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class UpdateQueue:
+    """Bounded, sharded queue of updates served by ``workers`` tasks.
+
+    Each worker owns one shard and updates are routed by chat, so updates from the same chat
+    are processed one at a time and in arrival order while different chats run in parallel.
+    When a shard stays full for ``enqueue_timeout`` seconds the update is rejected and the
+    webhook answers 503, which makes Telegram retry later instead of piling up memory.
+    """
+
+    def __init__(
+        self,
+        workers: int = WEBHOOK_WORKERS,
+        maxsize: int = WEBHOOK_QUEUE_SIZE,
+        enqueue_timeout: float = WEBHOOK_ENQUEUE_TIMEOUT,
+    ):
+        self.workers = workers
+        self.shard_size = max(maxsize // max(workers, 1), 1)
+        self.enqueue_timeout = enqueue_timeout
+        self.stats = IngestStats()
+        self._queues: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    def start(self, dp: Dispatcher, bot: Bot):
+        if self._tasks:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.shard_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._work(dp, bot, q)) for q in self._queues]
+        self._accepting = True
+
+    async def submit(self, update: Update) -> bool:
+        """Enqueue an update; False if the queue is closed or stayed full past the timeout."""
+        if not self._accepting:
+            self.stats.rejected += 1
+            return False
+        queue = self._queues[_chat_key(update) % self.workers]
+        try:
+            await asyncio.wait_for(queue.put((update, time.monotonic())), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.stats.rejected += 1
+            return False
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, self.depth())
+        return True
+
+    async def _work(self, dp: Dispatcher, bot: Bot, queue: asyncio.Queue):
+        while (item := await queue.get()) is not None:
+            update, enqueued_at = item
+            waited = time.monotonic() - enqueued_at
+            self.stats.wait_total += waited
+            self.stats.wait_max = max(self.stats.wait_max, waited)
+            try:
+                await dp.feed_update(bot, update)
+            except Exception:
+                self.stats.failed += 1
+                logger.exception("Failed to process update %d", update.update_id)
+            finally:
+                self.stats.processed += 1
+
+    async def stop(self, timeout: float = WEBHOOK_DRAIN_TIMEOUT):
+        """Stop accepting updates and give the workers ``timeout`` seconds to drain their shards."""
+        if not self._tasks:
+            return
+        self._accepting = False
+
+        async def drain():
+            for queue in self._queues:
+                await queue.put(None)
+            await asyncio.gather(*self._tasks)
+
+        try:
+            await asyncio.wait_for(drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Update queue drain timed out; %d queued updates dropped", self.depth())
+            for task in self._tasks:
+                task.cancel()
+        self._tasks = []
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def status(self) -> dict:
+        stats = self.stats
+        processed = stats.processed or 1
+        return {
+            "workers": self.workers,
+            "capacity": self.shard_size * self.workers,
+            "depth": self.depth(),
+            "max_depth": stats.max_depth,
+            "enqueued": stats.enqueued,
+            "processed": stats.processed,
+            "failed": stats.failed,
+            "rejected": stats.rejected,
+            "wait_avg_ms": round(stats.wait_total / processed * 1000, 3),
+            "wait_max_ms": round(stats.wait_max * 1000, 3),
+        }
+
+
+update_queue = UpdateQueue()
@@ -0,0 +1,86 @@
+"""Elect one process to run startup side effects that must not be repeated by every worker."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+import asyncpg
+
+from src.config import DATABASE_URL, LEADER_LOCK_ID, LEADER_RETRY_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """Hold a Postgres session-level advisory lock on a dedicated connection.
+
+    The process that gets the lock runs ``duties`` until it exits, loses the connection or the
+    duties raise; the session is then closed, Postgres releases the lock, and the first process
+    to retry (every ``retry_interval`` seconds) takes over and runs ``duties`` again from the start.
+    """
+
+    def __init__(self, lock_id: int = LEADER_LOCK_ID, retry_interval: float = LEADER_RETRY_INTERVAL):
+        self.lock_id = lock_id
+        self.retry_interval = retry_interval
+        self.is_leader = False
+        self._task: asyncio.Task | None = None
+
+    async def _ping(self, connection: asyncpg.Connection):
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            # Fails once the session (and with it the lock) is gone
+            await connection.fetchval("SELECT 1")
+
+    async def _lead(self, connection: asyncpg.Connection, duties: Callable[[], Awaitable]):
+        self.is_leader = True
+        logger.info("Acquired leader lock %d", self.lock_id)
+        work = asyncio.create_task(duties())
+        ping = asyncio.create_task(self._ping(connection))
+        try:
+            done, _ = await asyncio.wait({work, ping}, return_when=asyncio.FIRST_COMPLETED)
+            if work in done and work.exception() is not None:
+                # Give up the lock, so this or another process retries the duties from the start
+                logger.error("Leader duties failed, releasing leader lock %d", self.lock_id, exc_info=work.exception())
+                raise work.exception()
+            # Duties that finished cleanly have nothing left to do; keep the lock while the session lives
+            await ping
+        finally:
+            self.is_leader = False
+            work.cancel()
+            ping.cancel()
+            await asyncio.gather(work, ping, return_exceptions=True)
+
+    async def _run(self, duties: Callable[[], Awaitable]):
+        dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                while not await connection.fetchval("SELECT pg_try_advisory_lock($1)", self.lock_id):
+                    await asyncio.sleep(self.retry_interval)
+                await self._lead(connection, duties)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Leader election failed, retrying")
+                await asyncio.sleep(self.retry_interval)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    # Closing the session releases the advisory lock
+                    await connection.close()
+
+    def start(self, duties: Callable[[], Awaitable]):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(duties))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+leader = LeaderElection()
@@ -4,14 +4,31 @@ import os
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import MemoryStorage
 from fastapi import FastAPI, Request, Response
 
-from src.config import BOT_TOKEN, WEBHOOK_BASE_URL, WEBHOOK_SECRET
+from src.config import (
+    BOT_TOKEN, TELEGRAM_API_URL, WEBHOOK_BASE_URL, WEBHOOK_SECRET, WEBHOOK_WORKERS, WEB_CONCURRENCY,
+    BLOCKED_CACHE_LISTEN, FSM_STORAGE, METRICS_TOKEN,
+)
 from src.handlers import user, seller, admin
+from src.middlewares import DbSessionMiddleware, HandlerMetricsMiddleware, ReleaseDbSessionMiddleware
 from src.scraper import fetch_future_beitar_games
 from src.db.repositories import sync_scraped_events
 from src.db.session import async_session
+from src.db.blocked_cache import blocked_cache
+from src.db.user_buffer import user_buffer
+from src.db.fsm_storage import fsm_storage
+from src.outbox import outbox
+from src.ingest import update_queue
+from src.dedup import deduplicator
+from src.leader import leader
+from src.metrics import metrics
+from src.rollups import rollups
+from src import runtime
 from src.dashboard.routes import router as dashboard_router
 
 logging.basicConfig(level=logging.INFO)
@@ -21,8 +38,21 @@ app = FastAPI()
 app.include_router(dashboard_router)
 
 
+@app.get("/metrics")
+async def metrics_endpoint(request: Request) -> Response:
+    if METRICS_TOKEN and request.headers.get("Authorization", "") != f"Bearer {METRICS_TOKEN}":
+        return Response(status_code=401)
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def create_dispatcher() -> Dispatcher:
-    dp = Dispatcher()
+    # Postgres-backed FSM lets several bot processes share one conversation
+    storage = fsm_storage if FSM_STORAGE == "postgres" else MemoryStorage()
+    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(DbSessionMiddleware())
+    # Inner middlewares on the dispatcher apply to the handlers of every included router
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
     # Admin cancel must be registered first so it catches ❌ ביטול during FSM states
     dp.include_router(admin.router)
     dp.include_router(seller.router)
@@ -53,20 +83,64 @@ async def periodic_sync():
         await sync_beitar_events()
 
 
-async def on_startup(bot: Bot):
-    await sync_beitar_events()
-    asyncio.create_task(periodic_sync())
+SET_WEBHOOK_MAX_BACKOFF = 300  # seconds
 
+
+async def set_webhook(bot: Bot):
+    """Register the webhook, retrying with exponential backoff until Telegram accepts it."""
+    webhook_url = f"{WEBHOOK_BASE_URL}/webhook"
+    delay = 1
+    while True:
+        try:
+            await bot.set_webhook(webhook_url, secret_token=WEBHOOK_SECRET)
+            logger.info(f"Webhook set to {webhook_url}")
+            return
+        except Exception:
+            logger.exception("Failed to set webhook, retrying in %ds", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SET_WEBHOOK_MAX_BACKOFF)
+
+
+async def lead(bot: Bot):
+    """Side effects that must happen once per deployment, not once per worker process."""
+    duties = [rollups.run(), sync_beitar_events(), periodic_sync()]
     if WEBHOOK_BASE_URL:
-        webhook_url = f"{WEBHOOK_BASE_URL}/webhook"
-        await bot.set_webhook(webhook_url, secret_token=WEBHOOK_SECRET)
-        logger.info(f"Webhook set to {webhook_url}")
-    else:
-        await bot.delete_webhook()
-        logger.info("Running in polling mode")
+        duties.append(set_webhook(bot))
+    await asyncio.gather(*duties)
 
 
-bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+async def on_startup(bot: Bot):
+    await blocked_cache.refresh()
+    if BLOCKED_CACHE_LISTEN:
+        blocked_cache.start_listener()
+    outbox.start(bot)
+    user_buffer.start()
+    if dp.storage is fsm_storage:
+        fsm_storage.start()
+
+    if not WEBHOOK_BASE_URL:
+        await bot.delete_webhook()
+        logger.info("Running in polling mode")
+    leader.start(lambda: lead(bot))
+
+
+async def on_shutdown():
+    await update_queue.stop()
+    await leader.stop()
+    await deduplicator.stop()
+    await outbox.stop()
+    await user_buffer.stop()
+    await blocked_cache.stop()
+    await dp.storage.close()
+
+
+bot = Bot(
+    token=BOT_TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None,
+    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+)
+# Handlers reply after their reads; don't hold a pooled connection idle in transaction meanwhile
+bot.session.middleware(ReleaseDbSessionMiddleware())
 dp = create_dispatcher()
 
 
@@ -78,24 +152,58 @@ async def webhook_handler(request: Request) -> Response:
             return Response(status_code=403)
 
     from aiogram.types import Update
-    update = Update.model_validate(await request.json(), context={"bot": bot})
-    await dp.feed_update(bot, update)
+    # Validate the raw body through pydantic's JSON parser instead of json.loads + dict validation
+    update = Update.model_validate_json(await request.body(), context={"bot": bot})
+    if await deduplicator.is_duplicate(update.update_id):
+        return Response(status_code=200)
+
+    if update_queue.running:
+        # 503 tells Telegram to redeliver later instead of growing the backlog
+        if not await update_queue.submit(update):
+            await deduplicator.forget(update.update_id)
+            return Response(status_code=503)
+        return Response(status_code=200)
+    try:
+        await dp.feed_update(bot, update)
+    except Exception:
+        # Let Telegram's redelivery of this update through instead of dropping it as a duplicate
+        await deduplicator.forget(update.update_id)
+        raise
     return Response(status_code=200)
 
 
+if WEBHOOK_BASE_URL:
+    # Registered at import time so every uvicorn worker process runs them
+    @app.on_event("startup")
+    async def fastapi_startup():
+        await on_startup(bot)
+        deduplicator.start()
+        if WEBHOOK_WORKERS > 0:
+            update_queue.start(dp, bot)
+
+    @app.on_event("shutdown")
+    async def fastapi_shutdown():
+        await on_shutdown()
+
+
+def serve_workers():
+    """Webhook mode with WEB_CONCURRENCY processes sharing one listening socket."""
+    import uvicorn
+
+    port = int(os.getenv("PORT", 8000))
+    uvicorn.run("src.main:app", host="0.0.0.0", port=port, workers=WEB_CONCURRENCY, **runtime.uvicorn_options())
+
+
 async def main():
     dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
 
     if WEBHOOK_BASE_URL:
         # Webhook mode: just run FastAPI (serves both webhook + dashboard)
         import uvicorn
 
-        @app.on_event("startup")
-        async def fastapi_startup():
-            await on_startup(bot)
-
         port = int(os.getenv("PORT", 8000))
-        config = uvicorn.Config(app, host="0.0.0.0", port=port)
+        config = uvicorn.Config(app, host="0.0.0.0", port=port, **runtime.uvicorn_options())
         server = uvicorn.Server(config)
         await server.serve()
     else:
@@ -104,7 +212,7 @@ async def main():
 
         async def run_fastapi():
             port = int(os.getenv("PORT", 8000))
-            config = uvicorn.Config(app, host="0.0.0.0", port=port, log_level="info")
+            config = uvicorn.Config(app, host="0.0.0.0", port=port, log_level="info", **runtime.uvicorn_options())
             server = uvicorn.Server(config)
             await server.serve()
 
@@ -117,4 +225,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if WEBHOOK_BASE_URL and WEB_CONCURRENCY > 1:
+        serve_workers()
+    else:
+        runtime.run(main())
@@ -0,0 +1,127 @@
+"""In-process handler, fan-out, pool and ingest metrics, rendered in the Prometheus text format."""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+from src.db.session import pool_status
+from src.ingest import update_queue
+
+# Handler latency buckets, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; per-bucket counts are made cumulative only when rendered."""
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        lines = []
+        total = 0
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {total}")
+        return lines
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class Metrics:
+    """Counters, gauges and histograms updated from the event loop.
+
+    Every update runs on the single event-loop thread and the updates are plain integer and
+    float operations with no ``await`` in between, so no locking is needed and recording a
+    handler call costs a dict lookup and a bisect. Values are per process: with several
+    workers, each scrape sees the process that served it.
+    """
+
+    def __init__(self):
+        self.handler_latency: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.router_latency: dict[str, Histogram] = defaultdict(Histogram)
+        self.handler_errors: dict[tuple[str, str, str], int] = defaultdict(int)
+        self.in_flight: dict[str, int] = defaultdict(int)
+        # (outbox message kind, outcome) -> recipients
+        self.alerts: dict[tuple[str, str], int] = defaultdict(int)
+
+    def handler_started(self, router: str):
+        self.in_flight[router] += 1
+
+    def handler_finished(self, router: str, handler: str, seconds: float, error: BaseException | None = None):
+        self.in_flight[router] -= 1
+        self.handler_latency[router, handler].observe(seconds)
+        self.router_latency[router].observe(seconds)
+        if error is not None:
+            self.handler_errors[router, handler, type(error).__name__] += 1
+
+    def record_alerts(self, kind: str, sent: int, failed: int, throttled: int):
+        self.alerts[kind, "sent"] += sent
+        self.alerts[kind, "failed"] += failed
+        self.alerts[kind, "throttled"] += throttled
+
+    def render(self) -> str:
+        lines = [
+            "# HELP tickalert_handler_seconds Time spent in each bot handler.",
+            "# TYPE tickalert_handler_seconds histogram",
+        ]
+        for (router, handler), histogram in sorted(self.handler_latency.items()):
+            lines += histogram.lines("tickalert_handler_seconds", _labels(router=router, handler=handler))
+        lines += [
+            "# HELP tickalert_router_seconds Time spent in the handlers of each router.",
+            "# TYPE tickalert_router_seconds histogram",
+        ]
+        for router, histogram in sorted(self.router_latency.items()):
+            lines += histogram.lines("tickalert_router_seconds", _labels(router=router))
+        lines += [
+            "# HELP tickalert_handler_errors_total Handler calls that raised, by exception type.",
+            "# TYPE tickalert_handler_errors_total counter",
+        ]
+        for (router, handler, error), count in sorted(self.handler_errors.items()):
+            lines.append(f"tickalert_handler_errors_total{{{_labels(router=router, handler=handler, error=error)}}} {count}")
+        lines += [
+            "# HELP tickalert_handlers_in_flight Handler calls currently running.",
+            "# TYPE tickalert_handlers_in_flight gauge",
+        ]
+        for router, count in sorted(self.in_flight.items()):
+            lines.append(f"tickalert_handlers_in_flight{{{_labels(router=router)}}} {count}")
+        lines += [
+            "# HELP tickalert_alert_messages_total Outbox broadcast deliveries by message kind and outcome.",
+            "# TYPE tickalert_alert_messages_total counter",
+        ]
+        for (kind, outcome), count in sorted(self.alerts.items()):
+            lines.append(f"tickalert_alert_messages_total{{{_labels(kind=kind, outcome=outcome)}}} {count}")
+
+        pool = pool_status()
+        ingest = update_queue.status()
+        for name, kind, help_text, value in [
+            ("db_pool_size", "gauge", "Configured connection pool size.", pool["size"]),
+            ("db_pool_checked_out", "gauge", "Connections currently checked out.", pool["checked_out"]),
+            ("db_pool_overflow", "gauge", "Connections open beyond the pool size.", pool["overflow"]),
+            ("db_pool_checkouts_total", "counter", "Connection checkouts.", pool["checkouts"]),
+            ("db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.", pool["timeouts"]),
+            ("db_pool_wait_max_seconds", "gauge", "Longest checkout wait so far.", pool["wait_max_ms"] / 1000),
+            ("ingest_queue_depth", "gauge", "Webhook updates waiting for a worker.", ingest["depth"]),
+            ("ingest_queue_capacity", "gauge", "Webhook queue capacity.", ingest["capacity"]),
+            ("ingest_processed_total", "counter", "Webhook updates processed by the worker pool.", ingest["processed"]),
+            ("ingest_failed_total", "counter", "Webhook updates whose processing raised.", ingest["failed"]),
+            ("ingest_rejected_total", "counter", "Webhook updates rejected because the queue was full.", ingest["rejected"]),
+        ]:
+            lines += [
+                f"# HELP tickalert_{name} {help_text}",
+                f"# TYPE tickalert_{name} {kind}",
+                f"tickalert_{name} {value}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,125 @@
+"""Aiogram middlewares shared by all routers."""
+
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject, User
+from sqlalchemy import event as sa_event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.blocked_cache import blocked_cache
+from src.db.session import async_session, engine
+from src.db.user_buffer import user_buffer
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# [statement count, seconds] for the update currently being handled
+_db_usage: ContextVar[list | None] = ContextVar("db_usage", default=None)
+# Session of the update currently being handled, so Bot API calls can end its transaction first
+_update_session: ContextVar[AsyncSession | None] = ContextVar("update_session", default=None)
+
+
+@sa_event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _db_usage.get() is not None:
+        context._update_query_start = time.perf_counter()
+
+
+@sa_event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    usage = _db_usage.get()
+    if usage is not None and not context.execution_options.get("skip_query_stats"):
+        usage[0] += 1
+        usage[1] += time.perf_counter() - context._update_query_start
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Open one session per update and resolve the sender before any handler runs.
+
+    Handlers receive ``session`` (shared by everything that runs for the update) and
+    ``blocked``. Unblocked senders have their profile recorded through the user write
+    buffer, so handlers no longer call ``is_blocked``/``ensure_user`` themselves. The session's
+    transaction is ended before every Bot API call (``ReleaseDbSessionMiddleware``), so its
+    connection goes back to the pool while the handler waits on Telegram.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        usage = [0, 0.0]
+        token = _db_usage.set(usage)
+        try:
+            async with async_session() as session:
+                session_token = _update_session.set(session)
+                user: User | None = data.get("event_from_user")
+                blocked = False
+                if user is not None:
+                    blocked = await blocked_cache.is_blocked(user.id)
+                    if not blocked:
+                        await user_buffer.touch(user.id, user.username, user.first_name, session=session)
+                data["session"] = session
+                data["blocked"] = blocked
+                try:
+                    return await handler(event, data)
+                finally:
+                    _update_session.reset(session_token)
+        finally:
+            _db_usage.reset(token)
+            logger.debug("Update %s: %d statements, %.1f ms in DB", getattr(event, "update_id", "?"), usage[0], usage[1] * 1000)
+
+
+class ReleaseDbSessionMiddleware(BaseRequestMiddleware):
+    """Bot API request middleware that ends the current update's DB transaction before the call.
+
+    Repository writes commit themselves, so this only ends the read transactions handlers open
+    before replying; the session checks a connection out again on its next query.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        session = _update_session.get()
+        if session is not None and session.in_transaction():
+            await session.commit()
+        return await make_request(bot, method)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Record latency, errors and in-flight calls of the handler chosen for each event.
+
+    Registered as an inner middleware, so it runs after filtering and ``data["handler"]`` is
+    the matched handler; the router is named after the handler's module.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        callback = data["handler"].callback
+        router = callback.__module__.rsplit(".", 1)[-1]
+        name = getattr(callback, "__name__", "unknown")
+        metrics.handler_started(router)
+        started = time.perf_counter()
+        error = None
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            metrics.handler_finished(router, name, time.perf_counter() - started, error)
@@ -0,0 +1,163 @@
+"""Background dispatcher that drains the Postgres outbox of ticket alerts and "sold" notices."""
+
+import asyncio
+import logging
+
+from aiogram import Bot
+
+from src.broadcast import BroadcastResult, broadcaster
+from src.config import (
+    OUTBOX_BATCH_SIZE, OUTBOX_CHUNK_SIZE, OUTBOX_LEASE_SECONDS, OUTBOX_MAX_ATTEMPTS, OUTBOX_POLL_INTERVAL,
+)
+from src.db.models import OutboxMessage
+from src.db.session import async_session
+from src.db import repositories as repo
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """Claim pending outbox rows in batches and broadcast them.
+
+    Recipients are read in keyset pages of ``OUTBOX_CHUNK_SIZE`` and progress is checkpointed
+    after every page, so a message interrupted by a crash or redeploy resumes after the last
+    delivered recipient instead of starting over. Several bot replicas can run a dispatcher
+    against the same table; row leases keep them from sending the same message twice.
+
+    A batch shares the bot-wide send rate, so a message can take far longer than one lease to
+    deliver: leases are renewed on a heartbeat every third of ``lease_seconds``, independent of
+    chunk progress. Progress writes carry the claim's token, and a delivery whose lease was
+    taken over is stopped. A message claimed more than ``max_attempts`` times is dead-lettered.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        lease_seconds: float = OUTBOX_LEASE_SECONDS,
+        chunk_size: int = OUTBOX_CHUNK_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.chunk_size = chunk_size
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self, bot: Bot):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bot))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Skip the poll delay; called right after a handler commits a new outbox row."""
+        self._wakeup.set()
+
+    async def _run(self, bot: Bot):
+        while True:
+            # Cleared before claiming, so a wake() that lands during the claim isn't lost
+            self._wakeup.clear()
+            try:
+                async with async_session() as session:
+                    messages = await repo.claim_outbox_messages(session, self.batch_size, self.lease_seconds)
+                if messages:
+                    await self._deliver_batch(bot, messages)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver_batch(self, bot: Bot, messages: list[OutboxMessage]):
+        deliveries: dict[int, asyncio.Task] = {}
+        for message in messages:
+            if message.attempts > self.max_attempts:
+                async with async_session() as session:
+                    await repo.fail_outbox_message(session, message.id, message.locked_by)
+                logger.error(
+                    "Outbox #%d (%s, event %d) dead-lettered after %d attempts",
+                    message.id, message.kind, message.event_id, message.attempts - 1,
+                )
+                continue
+            deliveries[message.id] = asyncio.create_task(self._deliver(bot, message))
+        if not deliveries:
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(messages[0].locked_by, deliveries))
+        try:
+            await asyncio.gather(*deliveries.values(), return_exceptions=True)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, token: str, deliveries: dict[int, asyncio.Task]):
+        """Renew the batch's leases until its deliveries finish; stop any whose lease was lost."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            active = [message_id for message_id, task in deliveries.items() if not task.done()]
+            if not active:
+                return
+            try:
+                async with async_session() as session:
+                    held = await repo.renew_outbox_leases(session, active, token, self.lease_seconds)
+            except Exception:
+                logger.exception("Renewing outbox leases failed")
+                continue
+            for message_id in set(active) - held:
+                logger.warning("Lost the lease on outbox #%d, stopping its delivery", message_id)
+                deliveries[message_id].cancel()
+
+    async def _deliver(self, bot: Bot, message: OutboxMessage):
+        total = BroadcastResult(message.sent_count, message.failed_count, message.throttled_count)
+        after = message.last_recipient_id
+        try:
+            while True:
+                async with async_session() as session:
+                    recipients = await repo.get_alert_recipients_page(
+                        session, message.event_id, message.exclude_telegram_id, after, self.chunk_size,
+                    )
+                if not recipients:
+                    break
+                result = await broadcaster.broadcast(bot, recipients, message.body)
+                metrics.record_alerts(message.kind, result.sent, result.failed, result.throttled)
+                after = recipients[-1]
+                async with async_session() as session:
+                    held = await repo.checkpoint_outbox_message(
+                        session, message.id, message.locked_by, after, result.sent, result.failed, result.throttled,
+                    )
+                if not held:
+                    logger.warning("Lost the lease on outbox #%d, stopping its delivery", message.id)
+                    return
+                total.sent += result.sent
+                total.failed += result.failed
+                total.throttled += result.throttled
+
+            async with async_session() as session:
+                if not await repo.complete_outbox_message(session, message.id, message.locked_by):
+                    logger.warning("Lost the lease on outbox #%d before marking it sent", message.id)
+                    return
+        except Exception:
+            # The lease is no longer renewed, so the message is retried once it expires
+            logger.exception("Outbox #%d delivery failed (attempt %d of %d)", message.id, message.attempts, self.max_attempts)
+            return
+        logger.info(
+            "Outbox #%d (%s, event %d): %d sent, %d failed, %d throttled",
+            message.id, message.kind, message.event_id, total.sent, total.failed, total.throttled,
+        )
+
+
+outbox = OutboxDispatcher()
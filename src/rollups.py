@@ -0,0 +1,39 @@
+"""Keep the hourly/daily activity rollups behind the dashboard charts up to date."""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from src.config import ROLLUP_GRACE, ROLLUP_INTERVAL
+from src.db.session import async_session
+from src.db import repositories as repo
+
+logger = logging.getLogger(__name__)
+
+
+class RollupRefresher:
+    """Refresh the open rollup buckets every ``interval`` seconds.
+
+    Each refresh only rescans rows newer than the last frozen bucket, so its cost follows recent
+    activity rather than table size. Run it in one process only (the leader); the state rows are
+    locked during a refresh, so an overlap during failover just waits.
+    """
+
+    def __init__(self, interval: float = ROLLUP_INTERVAL, grace: float = ROLLUP_GRACE):
+        self.interval = interval
+        self.grace = grace
+
+    async def refresh(self):
+        async with async_session() as session:
+            await repo.refresh_activity_rollups(session, datetime.utcnow(), self.grace)
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh activity rollups")
+            await asyncio.sleep(self.interval)
+
+
+rollups = RollupRefresher()
@@ -0,0 +1,35 @@
+"""Optional fast runtime: uvloop event loop and httptools HTTP parser, when installed."""
+
+import asyncio
+import importlib.util
+import logging
+
+from src.config import FAST_RUNTIME
+
+logger = logging.getLogger(__name__)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options() -> dict:
+    """uvicorn ``loop``/``http`` settings: uvloop and httptools with FAST_RUNTIME=1 if installed, else the defaults."""
+    if not FAST_RUNTIME:
+        return {}
+    options = {}
+    for option, module in (("loop", "uvloop"), ("http", "httptools")):
+        if _installed(module):
+            options[option] = module
+        else:
+            logger.warning("FAST_RUNTIME is set but %s is not installed; using uvicorn's default %s", module, option)
+    return options
+
+
+def run(main):
+    """``asyncio.run(main)``, on a uvloop event loop when FAST_RUNTIME=1 and uvloop is installed."""
+    if FAST_RUNTIME and _installed("uvloop"):
+        import uvloop
+
+        return uvloop.run(main)
+    return asyncio.run(main)